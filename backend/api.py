@@ -1,38 +1,57 @@
 from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, List, Set, Union, Tuple, Any
+import asyncio
+import concurrent.futures
 import json
 import os
+import pickle
+import queue
+import secrets
 import time
 import logging
-import uuid
+import logging.handlers
 import uvicorn
+import xxhash
 import numpy as np
 import io
-import base64
+
+try:
+    # SIMD-кодировщик (AVX2/SSSE3), в разы быстрее стандартного base64
+    # на мегабайтных PNG; API полностью совместим
+    import pybase64 as base64
+except ImportError:
+    import base64
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 import matplotlib.pyplot as plt
 from PIL import Image
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from datetime import datetime
 
-# Настройка логирования
+# Настройка логирования: обработчики вынесены за очередь, чтобы запись
+# на диск и в поток не блокировала event loop на горячем пути запроса.
+# QueueHandler форматирует запись и кладет её в очередь; QueueListener
+# (запускается в lifespan) пишет из фонового потока
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler("api.log")
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
+)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.StreamHandler(),
+    logging.FileHandler("api.log", delay=True),
 )
 logger = logging.getLogger("young_diagrams_api")
 
 # Импортируем наши классы симуляторов
 from diagrams2d import DiagramSimulator2D
 from diagrams3d import DiagramSimulator3D
-from common.utils import save_cells_to_file
+from common.utils import save_cells_to_file, warm_kernels
 
 # Константы для настроек приложения
 APP_NAME = "Young Diagrams API"
@@ -42,13 +61,43 @@ ALLOWED_ORIGINS = ["*"]
 PORT = 8000
 HOST = "0.0.0.0"
 
+# Пул процессов для CPU-тяжелых задач (симуляции, рендеринг),
+# чтобы не блокировать event loop и задействовать все ядра
+executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+def _init_pool_worker() -> None:
+    """
+    Перенастраивает логирование в процессе-воркере пула.
+
+    Воркеры наследуют QueueHandler родителя, но QueueListener живет только
+    в родительском процессе: записи копились бы в локальной очереди воркера
+    бесконечно и никогда не печатались. Заменяем обработчики корневого
+    логгера на прямой StreamHandler.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+
 # Менеджер жизненного цикла для инициализации и завершения ресурсов
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Код выполняется при запуске приложения
+    global executor
+    _log_listener.start()
     logger.info(f"Запуск приложения {APP_NAME} v{API_VERSION}")
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=os.cpu_count(), initializer=_init_pool_worker)
+    # Прогреваем JIT-ядра до первого запроса: компиляция происходит сейчас,
+    # а не внутри первого POST /simulate/*
+    warm_kernels()
     yield  # Здесь приложение работает
+    executor.shutdown(wait=False)
     logger.info(f"Завершение работы приложения {APP_NAME}")
+    _log_listener.stop()
 
 # FastAPI app
 app = FastAPI(
@@ -56,7 +105,11 @@ app = FastAPI(
     description="API для симуляции и визуализации диаграмм Юнга",
     version=API_VERSION,
     lifespan=lifespan,
-    debug=DEBUG
+    debug=DEBUG,
+    # orjson сериализует ответы быстрее стандартного json и понимает ndarray;
+    # горячие endpoints дополнительно возвращают ORJSONResponse напрямую,
+    # минуя jsonable_encoder
+    default_response_class=ORJSONResponse
 )
 
 # Добавляем CORS middleware для обработки запросов с разных источников
@@ -74,23 +127,29 @@ async def log_requests(request: Request, call_next):
     """
     Middleware для логирования запросов и времени их выполнения.
     """
-    request_id = str(uuid.uuid4())
-    start_time = time.time()
-    
+    # Healthcheck-пути опрашиваются постоянно — не засоряем лог
+    if request.url.path in ("/", "/status"):
+        return await call_next(request)
+
+    # token_hex быстрее uuid4 и достаточен для идентификатора запроса;
+    # perf_counter_ns — монотонный целочисленный таймер без FP-операций
+    request_id = secrets.token_hex(8)
+    start_ns = time.perf_counter_ns()
+
     # Добавляем request_id для отслеживания
     request.state.request_id = request_id
-    logger.info(f"Начало запроса {request_id}: {request.method} {request.url.path}")
-    
+    logger.info("Начало запроса %s: %s %s", request_id, request.method, request.url.path)
+
     try:
         response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
+        process_ns = time.perf_counter_ns() - start_ns
+        response.headers["X-Process-Time"] = f"{process_ns / 1e9:.4f}"
         response.headers["X-Request-ID"] = request_id
-        
-        logger.info(f"Завершение запроса {request_id}: {response.status_code} за {process_time:.4f}с")
+
+        logger.info("Завершение запроса %s: %s за %.4fс", request_id, response.status_code, process_ns / 1e9)
         return response
     except Exception as e:
-        logger.error(f"Ошибка в запросе {request_id}: {str(e)}")
+        logger.error("Ошибка в запросе %s: %s", request_id, e)
         raise
         
 class SimulationParams2D(BaseModel):
@@ -107,55 +166,272 @@ class SimulationParams3D(BaseModel):
 last_2d_simulation = None
 last_3d_simulation = None
 
+# LRU-кэш готовых ответов /simulate/*: фронтенд повторяет запросы с теми же
+# параметрами при перезагрузке, поэтому храним уже сериализованные байты
+# вместе с результатом — попадание минует и симуляцию, и orjson
+_response_cache: "OrderedDict[Tuple[str, int, float, int], Tuple[Dict, bytes]]" = OrderedDict()
+_RESPONSE_CACHE_SIZE = 16
+
+def _cache_response(key: Tuple[str, int, float, int], result: Dict, body: bytes) -> None:
+    """Сохраняет результат и байты ответа в LRU-кэш с вытеснением самого старого."""
+    _response_cache[key] = (result, body)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > _RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+# LRU-кэш отрендеренных PNG предельных форм, ключ — (размерность, хэш данных).
+# Ключ зависит от содержимого, поэтому новая симуляция естественным образом
+# промахивается мимо кэша, а старые записи вытесняются по размеру
+_shape_png_cache: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+_SHAPE_CACHE_SIZE = 32
+
+def _cell_counts_digest(cell_counts: Union[Dict, Tuple[np.ndarray, ...]]) -> int:
+    """Быстрый хэш содержимого счетчиков ячеек для ключа кэша."""
+    if isinstance(cell_counts, tuple):
+        # SoA-колонки хэшируются напрямую через буферный протокол
+        h = xxhash.xxh64()
+        for column in cell_counts:
+            h.update(np.ascontiguousarray(column))
+        return h.intdigest()
+    return xxhash.xxh64(pickle.dumps(sorted(cell_counts.items()),
+                                     protocol=pickle.HIGHEST_PROTOCOL)).intdigest()
+
+def _cache_shape_png(key: Tuple[str, int], image: bytes) -> None:
+    """Сохраняет отрендеренный PNG в LRU-кэш с вытеснением самого старого."""
+    _shape_png_cache[key] = image
+    _shape_png_cache.move_to_end(key)
+    while len(_shape_png_cache) > _SHAPE_CACHE_SIZE:
+        _shape_png_cache.popitem(last=False)
+
+# Коалесцирование одновременных запросов симуляции: запросы с одинаковыми
+# (размерность, steps, alpha) объединяются в один проход симулятора
+# с суммарным числом runs, а агрегированные счетчики получают все ожидающие
+_BATCH_DEBOUNCE_S = 0.05
+
+class _SimBatch:
+    """Пакет ожидающих запросов симуляции с одинаковыми параметрами."""
+    __slots__ = ("runs", "future")
+
+    def __init__(self, runs: int, future: asyncio.Future):
+        self.runs = runs
+        self.future = future
+
+_pending_batches: Dict[Tuple[str, int, float], _SimBatch] = {}
+
+def _merge_soa(partials: List[Tuple[np.ndarray, ...]]) -> Tuple[np.ndarray, ...]:
+    """Суммирует частичные SoA-счетчики ячеек из параллельных прогонов."""
+    if len(partials) == 1:
+        return partials[0]
+    coords = np.concatenate([np.stack(p[:-1], axis=1) for p in partials])
+    counts = np.concatenate([p[-1] for p in partials])
+    unique_coords, inverse = np.unique(coords, axis=0, return_inverse=True)
+    summed = np.bincount(inverse, weights=counts).astype(np.int64)
+    columns = tuple(np.ascontiguousarray(unique_coords[:, i])
+                    for i in range(unique_coords.shape[1]))
+    return columns + (summed,)
+
+async def _run_batched_sim(dim: str, steps: int, alpha: float, runs: int,
+                           worker) -> Tuple[np.ndarray, ...]:
+    """
+    Запускает симуляцию через пул процессов, объединяя одновременные
+    запросы с одинаковыми параметрами в один проход симулятора.
+    """
+    loop = asyncio.get_running_loop()
+    key = (dim, steps, round(alpha, 4))
+
+    batch = _pending_batches.get(key)
+    if batch is not None:
+        # Уже есть ожидающий пакет — добавляем свои runs и ждем общий результат
+        batch.runs += runs
+        return await asyncio.shield(batch.future)
+
+    # Первый запрос с такими параметрами — открываем окно дебаунса,
+    # в течение которого другие запросы могут присоединиться
+    batch = _SimBatch(runs, loop.create_future())
+    _pending_batches[key] = batch
+
+    async def _execute_batch() -> None:
+        try:
+            try:
+                await asyncio.sleep(_BATCH_DEBOUNCE_S)
+            finally:
+                _pending_batches.pop(key, None)
+
+            # Прогоны независимы — раскладываем их по процессам пула
+            # и суммируем частичные счетчики; один прогон идет без накладных
+            # расходов на слияние
+            n_jobs = min(batch.runs, os.cpu_count() or 1)
+            base_runs, extra = divmod(batch.runs, n_jobs)
+            jobs = [
+                loop.run_in_executor(
+                    executor, worker, steps, alpha,
+                    base_runs + (1 if i < extra else 0)
+                )
+                for i in range(n_jobs)
+            ]
+            partials = await asyncio.gather(*jobs)
+            counts = _merge_soa(partials)
+        except BaseException as e:
+            # BaseException, а не Exception: future обязан разрешиться даже
+            # при CancelledError, иначе присоединившиеся запросы зависнут
+            if not batch.future.done():
+                batch.future.set_exception(e)
+        else:
+            if not batch.future.done():
+                batch.future.set_result(counts)
+
+    # Тело пакета выполняется отдельной задачей: отмена запроса-лидера
+    # (разрыв соединения клиентом) не отменяет общий прогон и не оставляет
+    # остальных ожидающих без результата
+    loop.create_task(_execute_batch())
+    return await asyncio.shield(batch.future)
+
 # Функция для конвертации результатов симуляции в формат для API
 def process_2d_cells(result):
     """
     Обрабатывает результаты 2D симуляции для API.
+
+    Возвращает колоночный (SoA) формат из NumPy-массивов — один
+    векторизованный проход вместо построения словаря на каждую ячейку.
     """
-    cells = []
     # Если результат имеет атрибут total_cell_counts (это экземпляр DiagramSimulator2D)
-    if hasattr(result, 'total_cell_counts') and result.total_cell_counts:
-        max_count = max(result.total_cell_counts.values())
-        for (x, y), count in result.total_cell_counts.items():
-            cells.append({
-                "x": x,
-                "y": y,
-                "count": count,
-                "normalized_count": count / max_count
-            })
+    if hasattr(result, 'total_cell_counts'):
+        result = result.total_cell_counts
     # Если результат уже словарь с данными ячеек
-    elif isinstance(result, dict) and "cells" in result:
-        cells = result["cells"]
-    
-    if not cells:
+    if isinstance(result, dict) and "cells" in result:
+        return result["cells"]
+
+    # SoA-кортеж из cells_soa() используется без копирования
+    if isinstance(result, tuple):
+        xs, ys, counts = result
+        if len(counts) == 0:
+            raise ValueError("Не удалось обработать данные ячеек")
+        return {
+            "x": xs,
+            "y": ys,
+            "count": counts,
+            "normalized_count": counts / counts.max()
+        }
+
+    if not result:
         raise ValueError("Не удалось обработать данные ячеек")
-    
-    return cells
+
+    # Иначе это словарь {(x, y): count} — извлекаем колонки одним проходом
+    # (колонки копируются в непрерывные массивы: orjson требует C-contiguous)
+    keys = np.fromiter(result.keys(), dtype=np.dtype((np.int64, 2)), count=len(result))
+    counts = np.fromiter(result.values(), dtype=np.int64, count=len(result))
+    return {
+        "x": np.ascontiguousarray(keys[:, 0]),
+        "y": np.ascontiguousarray(keys[:, 1]),
+        "count": counts,
+        "normalized_count": counts / counts.max()
+    }
 
 def process_3d_cells(result):
     """
     Обрабатывает результаты 3D симуляции для API.
+
+    Возвращает колоночный (SoA) формат из NumPy-массивов — один
+    векторизованный проход вместо построения словаря на каждую ячейку.
     """
-    cells = []
     # Если результат имеет атрибут total_cell_counts (это экземпляр DiagramSimulator3D)
-    if hasattr(result, 'total_cell_counts') and result.total_cell_counts:
-        max_count = max(result.total_cell_counts.values())
-        for (x, y, z), count in result.total_cell_counts.items():
-            cells.append({
-                "x": x,
-                "y": y,
-                "z": z,
-                "count": count,
-                "normalized_count": count / max_count
-            })
+    if hasattr(result, 'total_cell_counts'):
+        result = result.total_cell_counts
     # Если результат уже словарь с данными ячеек
-    elif isinstance(result, dict) and "cells" in result:
-        cells = result["cells"]
-    
-    if not cells:
+    if isinstance(result, dict) and "cells" in result:
+        return result["cells"]
+
+    # SoA-кортеж из cells_soa() используется без копирования
+    if isinstance(result, tuple):
+        xs, ys, zs, counts = result
+        if len(counts) == 0:
+            raise ValueError("Не удалось обработать данные ячеек")
+        return {
+            "x": xs,
+            "y": ys,
+            "z": zs,
+            "count": counts,
+            "normalized_count": counts / counts.max()
+        }
+
+    if not result:
         raise ValueError("Не удалось обработать данные ячеек")
-    
-    return cells
+
+    # Иначе это словарь {(x, y, z): count} — извлекаем колонки одним проходом
+    # (колонки копируются в непрерывные массивы: orjson требует C-contiguous)
+    keys = np.fromiter(result.keys(), dtype=np.dtype((np.int64, 3)), count=len(result))
+    counts = np.fromiter(result.values(), dtype=np.int64, count=len(result))
+    return {
+        "x": np.ascontiguousarray(keys[:, 0]),
+        "y": np.ascontiguousarray(keys[:, 1]),
+        "z": np.ascontiguousarray(keys[:, 2]),
+        "count": counts,
+        "normalized_count": counts / counts.max()
+    }
+
+# Функции-воркеры для пула процессов. Должны находиться на уровне модуля
+# и возвращать только picklable-данные (словари и строки, не объекты симуляторов).
+def _run_2d_sim(steps: int, alpha: float, runs: int) -> Tuple[np.ndarray, ...]:
+    """Выполняет 2D симуляцию в отдельном процессе и возвращает SoA-счетчики."""
+    simulator = DiagramSimulator2D()
+    # Прогоны уже распределены по процессам пула API — внутренний пул
+    # симулятора не нужен
+    simulator.simulate(n_steps=steps, alpha=alpha, runs=runs, max_workers=1)
+    return simulator.cells_soa()
+
+def _run_3d_sim(steps: int, alpha: float, runs: int) -> Tuple[np.ndarray, ...]:
+    """Выполняет 3D симуляцию в отдельном процессе и возвращает SoA-счетчики."""
+    simulator = DiagramSimulator3D()
+    # Прогоны уже распределены по процессам пула API — внутренний пул
+    # симулятора не нужен
+    simulator.simulate(n_steps=steps, alpha=alpha, runs=runs, max_workers=1)
+    return simulator.cells_soa()
+
+# Пул переиспользуемых фигур matplotlib (отдельный в каждом процессе-воркере):
+# Agg-канва выделяет большой RGBA-буфер, выгоднее очищать фигуру, чем создавать
+_fig_pool: "queue.Queue[plt.Figure]" = queue.Queue(maxsize=4)
+
+def _acquire_figure() -> plt.Figure:
+    """Берет фигуру из пула или создает новую, если пул пуст."""
+    try:
+        return _fig_pool.get_nowait()
+    except queue.Empty:
+        return plt.figure()
+
+def _release_figure(fig: plt.Figure) -> None:
+    """Возвращает фигуру в пул; при переполнении закрывает её."""
+    try:
+        _fig_pool.put_nowait(fig)
+    except queue.Full:
+        plt.close(fig)
+
+def _render_limit_shape_2d(cell_counts: Union[Dict, Tuple[np.ndarray, ...]]) -> bytes:
+    """Рендерит предельную форму 2D в отдельном процессе и возвращает PNG."""
+    simulator = DiagramSimulator2D()
+    # compute_limit_shape понимает SoA-кортеж напрямую, словарь не строится
+    simulator.total_cell_counts = cell_counts
+    fig = _acquire_figure()
+    try:
+        fig = simulator.limit_shape_visualize(fig=fig)
+        buf = io.BytesIO()
+        FigureCanvas(fig).print_png(buf)
+        return buf.getvalue()
+    finally:
+        _release_figure(fig)
+
+def _render_limit_shape_3d(cell_counts: Union[Dict, Tuple[np.ndarray, ...]]) -> bytes:
+    """Рендерит предельную форму 3D в отдельном процессе и возвращает PNG."""
+    simulator = DiagramSimulator3D()
+    # compute_limit_shape понимает SoA-кортеж напрямую, словарь не строится
+    simulator.total_cell_counts = cell_counts
+    fig = _acquire_figure()
+    try:
+        fig = simulator.visualize_limit_shape(fig=fig)
+        buf = io.BytesIO()
+        FigureCanvas(fig).print_png(buf)
+        return buf.getvalue()
+    finally:
+        _release_figure(fig)
 
 # Endpoint для проверки статуса API (health check)
 @app.get("/", tags=["Статус"])
@@ -189,28 +465,34 @@ async def simulate_2d(params: SimulationParams2D):
     global last_2d_simulation
     
     try:
-        logger.info(f"Starting 2D simulation with params: {params}")
-        
-        # Создаем экземпляр симулятора
-        simulator = DiagramSimulator2D()
-        
-        # Запускаем симуляцию
-        simulator.simulate(
-            n_steps=params.steps,
-            alpha=params.alpha,
-            runs=params.runs
+        logger.info("Starting 2D simulation with params: %s", params)
+
+        # Повторный запрос с теми же параметрами отдаем из кэша готовых ответов
+        cache_key = ("2d", params.steps, round(params.alpha, 4), params.runs)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            _response_cache.move_to_end(cache_key)
+            last_2d_simulation, body = cached
+            return Response(content=body, media_type="application/json")
+
+        # Запускаем симуляцию в пуле процессов, объединяя
+        # одновременные запросы с одинаковыми параметрами
+        cell_counts = await _run_batched_sim(
+            "2d", params.steps, params.alpha, params.runs, _run_2d_sim
         )
-        
+
         # Обрабатываем результаты симуляции
-        cells = process_2d_cells(simulator)
+        cells = process_2d_cells(cell_counts)
         
-        # Создаем результат для хранения
+        # Создаем результат для хранения; размеры берем одним
+        # векторизованным max по каждой колонке
+        xs, ys = cells["x"], cells["y"]
         result = {
             "cells": cells,
             "status": "success",
             "dimensions": {
-                "max_x": max(x["x"] for x in cells) + 1 if cells else 0,
-                "max_y": max(x["y"] for x in cells) + 1 if cells else 0
+                "max_x": int(xs.max()) + 1,
+                "max_y": int(ys.max()) + 1
             },
             "metadata": {
                 "steps": params.steps,
@@ -219,21 +501,28 @@ async def simulate_2d(params: SimulationParams2D):
                 "completed_at": datetime.now().isoformat()
             }
         }
-        
+
+        # SoA-счетчики сохраняем как есть: /limit-shape/2d использует
+        # их напрямую, без пересборки
+        result["cell_counts"] = cell_counts
+
         # Сохраняем результат в глобальную переменную
         last_2d_simulation = result
-        
-        # Подготавливаем результат для фронтенда
-        frontend_cells = []
-        for cell in cells:
-            frontend_cells.append({
-                "x": cell["x"],
-                "y": cell["y"],
-                "value": cell.get("normalized_count", 1.0)
-            })
-            
-        logger.info(f"2D симуляция успешно завершена. Создано {len(cells)} клеток.")
-        return {"cells": frontend_cells, "status": "success"}
+
+        # Подготавливаем результат для фронтенда: колонки сериализуются
+        # orjson напрямую из ndarray, без промежуточных Python-объектов
+        frontend_cells = {
+            "x": xs,
+            "y": ys,
+            "value": cells["normalized_count"]
+        }
+        # Колонки хранятся один раз: /visualize/2d отдает этот же вид без пересборки
+        result["frontend_cells"] = frontend_cells
+
+        logger.info("2D симуляция успешно завершена. Создано %d клеток.", len(xs))
+        response = ORJSONResponse({"cells": frontend_cells, "status": "success"})
+        _cache_response(cache_key, result, response.body)
+        return response
     except Exception as e:
         logger.error(f"Ошибка при запуске симуляции 2D: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -253,21 +542,12 @@ async def visualize_2d():
         )
     
     try:
-        # Преобразуем ячейки в формат, который нужен фронтенду
-        cells = []
-        if "cells" in last_2d_simulation and isinstance(last_2d_simulation["cells"], list):
-            for cell in last_2d_simulation["cells"]:
-                if isinstance(cell, dict) and "x" in cell and "y" in cell:
-                    cells.append({
-                        "x": cell["x"],
-                        "y": cell["y"],
-                        "value": cell.get("normalized_count", 1.0)
-                    })
-        
-        if not cells:
+        # Отдаем сохраненный при симуляции вид колонок — без итерации и пересборки
+        frontend_cells = last_2d_simulation.get("frontend_cells")
+        if not frontend_cells:
             raise ValueError("Ошибка при обработке данных ячеек")
-            
-        return {"cells": cells, "status": "success"}
+
+        return ORJSONResponse({"cells": frontend_cells, "status": "success"})
     except Exception as e:
         logger.error(f"Ошибка в visualize_2d: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -276,32 +556,38 @@ async def visualize_2d():
         )
 
 @app.get("/limit-shape/2d", tags=["2D Симуляции"])
-async def get_limit_shape_2d():
+async def get_limit_shape_2d(
+    format: str = Query("png", pattern="^(png|base64)$",
+                        description="Формат ответа: png или base64 (легаси)")
+):
     """Получение предельной формы для 2D диаграммы."""
     global last_2d_simulation
     
     try:
-        # Создаем симулятор
-        simulator = DiagramSimulator2D()
-        
-        # Пытаемся использовать последнюю симуляцию, если доступна
-        if last_2d_simulation and "cells" in last_2d_simulation:
-            for cell in last_2d_simulation["cells"]:
-                if "x" in cell and "y" in cell and "count" in cell:
-                    simulator.total_cell_counts[(cell["x"], cell["y"])] = cell["count"]
-        
-        # Создаем визуализацию предельной формы
-        fig = simulator.limit_shape_visualize()
-        
-        # Сохраняем изображение в формате base64
-        buf = io.BytesIO()
-        FigureCanvas(fig).print_png(buf)
-        buf.seek(0)
-        
-        # Кодируем изображение в base64
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        
-        return {"image": f"data:image/png;base64,{img_str}"}
+        # Используем SoA-счетчики последней симуляции, если доступны —
+        # они сохранены при симуляции, пересборка не нужна
+        cell_counts = {}
+        if last_2d_simulation:
+            cell_counts = last_2d_simulation.get("cell_counts", {})
+
+        # Повторные запросы той же формы отдаем из кэша вместо перерендеринга
+        key = ("2d", _cell_counts_digest(cell_counts))
+        image = _shape_png_cache.get(key)
+        if image is None:
+            # Рендерим предельную форму в пуле процессов, не блокируя event loop
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(executor, _render_limit_shape_2d, cell_counts)
+            _cache_shape_png(key, image)
+        else:
+            _shape_png_cache.move_to_end(key)
+
+        # Легаси-формат для старых клиентов: data-URL с base64
+        if format == "base64":
+            img_str = base64.b64encode(image).decode('ascii')
+            return ORJSONResponse({"image": f"data:image/png;base64,{img_str}"})
+
+        # Отдаем PNG напрямую: без base64 (+33% к размеру) и JSON-обертки
+        return Response(content=image, media_type="image/png")
     except Exception as e:
         logger.error(f"Ошибка при получении предельной формы 2D: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -320,29 +606,35 @@ async def simulate_3d(params: SimulationParams3D):
     global last_3d_simulation
     
     try:
-        logger.info(f"Starting 3D simulation with params: {params}")
-        
-        # Создаем экземпляр симулятора
-        simulator = DiagramSimulator3D()
-        
-        # Запускаем симуляцию
-        simulator.simulate(
-            n_steps=params.steps,
-            alpha=params.alpha,
-            runs=params.runs
+        logger.info("Starting 3D simulation with params: %s", params)
+
+        # Повторный запрос с теми же параметрами отдаем из кэша готовых ответов
+        cache_key = ("3d", params.steps, round(params.alpha, 4), params.runs)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            _response_cache.move_to_end(cache_key)
+            last_3d_simulation, body = cached
+            return Response(content=body, media_type="application/json")
+
+        # Запускаем симуляцию в пуле процессов, объединяя
+        # одновременные запросы с одинаковыми параметрами
+        cell_counts = await _run_batched_sim(
+            "3d", params.steps, params.alpha, params.runs, _run_3d_sim
         )
-        
+
         # Обрабатываем результаты симуляции
-        cells = process_3d_cells(simulator)
+        cells = process_3d_cells(cell_counts)
         
-        # Создаем результат для хранения
+        # Создаем результат для хранения; размеры берем одним
+        # векторизованным max по каждой колонке
+        xs, ys, zs = cells["x"], cells["y"], cells["z"]
         result = {
             "cells": cells,
             "status": "success",
             "dimensions": {
-                "max_x": max(x["x"] for x in cells) + 1 if cells else 0,
-                "max_y": max(x["y"] for x in cells) + 1 if cells else 0,
-                "max_z": max(x["z"] for x in cells) + 1 if cells else 0
+                "max_x": int(xs.max()) + 1,
+                "max_y": int(ys.max()) + 1,
+                "max_z": int(zs.max()) + 1
             },
             "metadata": {
                 "steps": params.steps,
@@ -351,22 +643,29 @@ async def simulate_3d(params: SimulationParams3D):
                 "completed_at": datetime.now().isoformat()
             }
         }
-        
+
+        # SoA-счетчики сохраняем как есть: /limit-shape/3d использует
+        # их напрямую, без пересборки
+        result["cell_counts"] = cell_counts
+
         # Сохраняем результат в глобальную переменную
         last_3d_simulation = result
-        
-        # Подготавливаем результат для фронтенда
-        frontend_cells = []
-        for cell in cells:
-            frontend_cells.append({
-                "x": cell["x"],
-                "y": cell["y"],
-                "z": cell["z"],
-                "value": cell.get("normalized_count", 1.0)
-            })
-            
-        logger.info(f"3D симуляция успешно завершена. Создано {len(cells)} клеток.")
-        return {"cells": frontend_cells, "status": "success"}
+
+        # Подготавливаем результат для фронтенда: колонки сериализуются
+        # orjson напрямую из ndarray, без промежуточных Python-объектов
+        frontend_cells = {
+            "x": xs,
+            "y": ys,
+            "z": zs,
+            "value": cells["normalized_count"]
+        }
+        # Колонки хранятся один раз: /visualize/3d отдает этот же вид без пересборки
+        result["frontend_cells"] = frontend_cells
+
+        logger.info("3D симуляция успешно завершена. Создано %d клеток.", len(xs))
+        response = ORJSONResponse({"cells": frontend_cells, "status": "success"})
+        _cache_response(cache_key, result, response.body)
+        return response
     except Exception as e:
         logger.error(f"Ошибка при запуске симуляции 3D: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -388,29 +687,12 @@ async def visualize_3d():
         )
     
     try:
-        # Преобразуем ячейки в формат, который нужен фронтенду
-        cells = []
-        if "cells" in last_3d_simulation and isinstance(last_3d_simulation["cells"], list):
-            for cell in last_3d_simulation["cells"]:
-                if isinstance(cell, dict) and "x" in cell and "y" in cell and "z" in cell:
-                    cells.append({
-                        "x": cell["x"],
-                        "y": cell["y"],
-                        "z": cell["z"],
-                        "value": cell.get("normalized_count", 1.0)
-                    })
-                elif isinstance(cell, (list, tuple)) and len(cell) >= 3:
-                    cells.append({
-                        "x": cell[0],
-                        "y": cell[1],
-                        "z": cell[2],
-                        "value": 1.0
-                    })
-        
-        if not cells:
+        # Отдаем сохраненный при симуляции вид колонок — без итерации и пересборки
+        frontend_cells = last_3d_simulation.get("frontend_cells")
+        if not frontend_cells:
             raise ValueError("Ошибка при обработке данных ячеек")
-            
-        return {"cells": cells, "status": "success"}
+
+        return ORJSONResponse({"cells": frontend_cells, "status": "success"})
     except Exception as e:
         logger.error(f"Ошибка в visualize_3d: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -419,32 +701,38 @@ async def visualize_3d():
         )
 
 @app.get("/limit-shape/3d", tags=["3D Симуляции"])
-async def get_limit_shape_3d():
+async def get_limit_shape_3d(
+    format: str = Query("png", pattern="^(png|base64)$",
+                        description="Формат ответа: png или base64 (легаси)")
+):
     """Получение предельной формы для 3D диаграммы."""
     global last_3d_simulation
     
     try:
-        # Создаем симулятор
-        simulator = DiagramSimulator3D()
-        
-        # Пытаемся использовать последнюю симуляцию, если доступна
-        if last_3d_simulation and "cells" in last_3d_simulation:
-            for cell in last_3d_simulation["cells"]:
-                if "x" in cell and "y" in cell and "z" in cell and "count" in cell:
-                    simulator.total_cell_counts[(cell["x"], cell["y"], cell["z"])] = cell["count"]
-        
-        # Создаем визуализацию предельной формы
-        fig = simulator.visualize_limit_shape()
-        
-        # Сохраняем изображение в формате base64
-        buf = io.BytesIO()
-        FigureCanvas(fig).print_png(buf)
-        buf.seek(0)
-        
-        # Кодируем изображение в base64
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        
-        return {"image": f"data:image/png;base64,{img_str}"}
+        # Используем SoA-счетчики последней симуляции, если доступны —
+        # они сохранены при симуляции, пересборка не нужна
+        cell_counts = {}
+        if last_3d_simulation:
+            cell_counts = last_3d_simulation.get("cell_counts", {})
+
+        # Повторные запросы той же формы отдаем из кэша вместо перерендеринга
+        key = ("3d", _cell_counts_digest(cell_counts))
+        image = _shape_png_cache.get(key)
+        if image is None:
+            # Рендерим предельную форму в пуле процессов, не блокируя event loop
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(executor, _render_limit_shape_3d, cell_counts)
+            _cache_shape_png(key, image)
+        else:
+            _shape_png_cache.move_to_end(key)
+
+        # Легаси-формат для старых клиентов: data-URL с base64
+        if format == "base64":
+            img_str = base64.b64encode(image).decode('ascii')
+            return ORJSONResponse({"image": f"data:image/png;base64,{img_str}"})
+
+        # Отдаем PNG напрямую: без base64 (+33% к размеру) и JSON-обертки
+        return Response(content=image, media_type="image/png")
     except Exception as e:
         logger.error(f"Ошибка при получении предельной формы 3D: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -453,4 +741,16 @@ async def get_limit_shape_3d():
         )
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=HOST, port=PORT)
+    # uvloop + httptools заменяют стандартный event loop и HTTP-парсер
+    # на реализации на C, что заметно увеличивает пропускную способность.
+    # Воркер ровно один: состояние последних симуляций и кэши ответов
+    # живут в памяти процесса, а GET /visualize/* после POST /simulate/*
+    # при нескольких воркерах попадал бы в чужой процесс без данных;
+    # CPU-тяжелая работа и так уходит в пул процессов
+    uvicorn.run(
+        "api:app",
+        host=HOST,
+        port=PORT,
+        loop="uvloop",
+        http="httptools",
+    )
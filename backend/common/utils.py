@@ -1,113 +1,229 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.interpolate import griddata
+from scipy.ndimage import gaussian_filter
 from typing import Dict, Tuple, List, Any, Set, Union, Optional
 import logging
 
+try:
+    from numba import njit
+except ImportError:  # Numba опциональна: без неё остается векторизованный NumPy
+    njit = None
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def save_cells_to_file(cell_counts: Dict[Tuple, int], filename: str) -> None:
+
+def _scale(coords: np.ndarray, counts: np.ndarray, scaling_factor: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Масштабирует координаты и нормализует частоты одним проходом.
+
+    Компилируется Numba (если установлена) — явная сигнатура и cache=True
+    убирают стоимость JIT-компиляции при первом запросе.
+    """
+    return coords.astype(np.float64) / scaling_factor, counts / counts.max()
+
+
+if njit is not None:
+    _scale = njit(
+        "Tuple((float64[:, :], float64[:]))(int32[:, :], float64[:], float64)",
+        cache=True,
+    )(_scale)
+
+
+def warm_kernels() -> None:
+    """
+    Прогревает Numba-ядра на синтетическом входе.
+
+    Вызывается при старте приложения, чтобы первый пользовательский запрос
+    не платил секунды за JIT-компиляцию; благодаря cache=True машинный код
+    дополнительно сохраняется на диск и переиспользуется воркерами.
     """
-    Сохранение количества ячеек в текстовый файл.
-    
+    if njit is None:
+        return
+    _scale(np.zeros((2, 2), dtype=np.int32), np.ones(2, dtype=np.float64), 1.0)
+
+    # Ядра роста диаграмм; импорты внутри функции, чтобы не создавать
+    # циклическую зависимость модулей
+    from diagrams2d.young_diagram import Diagram2D
+    Diagram2D().simulate(n_steps=2, alpha=1.0)
+
+    # Ядро роста 3D-диаграммы и скомпилированный цикл агрегации счетчиков
+    from diagrams3d.young_diagram import Diagram3D
+    from diagrams3d.simulator import DiagramSimulator3D
+    diagram = Diagram3D()
+    diagram.simulate(n_steps=2, alpha=1.0)
+    DiagramSimulator3D()._accumulate_run(diagram.cells)
+
+def save_cells_to_file(cell_counts: Dict[Tuple, int], filename: str,
+                       binary: bool = False) -> None:
+    """
+    Сохранение количества ячеек в файл.
+
     Параметры:
     -----------
     cell_counts : Dict[Tuple, int]
         Словарь с координатами ячеек в качестве ключей и количеством в качестве значений.
     filename : str
         Имя выходного файла.
+    binary : bool, default=False
+        Если True, сохраняет сжатый бинарный .npz (массивы coords и counts)
+        одним вызовом вместо текстовой строки на каждую ячейку.
     """
     try:
-        with open(filename, 'w') as f:
-            for coords, count in sorted(cell_counts.items()):
-                # Обработка координат как для 2D, так и для 3D
-                if len(coords) == 2:
-                    x, y = coords
-                    f.write(f'{x},{y},{count}\n')
-                elif len(coords) == 3:
-                    x, y, z = coords
-                    f.write(f'{x},{y},{z},{count}\n')
-        logger.info(f"Данные успешно сохранены в файл: {filename}")
+        if binary:
+            # Бинарный путь: один дамп на C-уровне, файл в разы меньше
+            coords = np.asarray(list(cell_counts.keys()), dtype=np.int32)
+            counts = np.asarray(list(cell_counts.values()), dtype=np.int64)
+            np.savez_compressed(filename, coords=coords, counts=counts)
+        else:
+            # Текстовый путь: собираем содержимое целиком и пишем одним вызовом,
+            # вместо форматирования и write() на каждую ячейку.
+            # Формат строки одинаково работает для 2D и 3D координат
+            lines = '\n'.join(
+                ','.join(map(str, coords + (count,)))
+                for coords, count in sorted(cell_counts.items())
+            )
+            with open(filename, 'w') as f:
+                f.write(lines + '\n')
+        logger.info("Данные успешно сохранены в файл: %s", filename)
     except Exception as e:
         logger.error(f"Ошибка при сохранении в файл {filename}: {str(e)}")
         raise
 
 
-def compute_limit_shape(cell_counts: Dict[Tuple, int], 
+def _scatter_on_grid(scaled_points: np.ndarray, frequencies: np.ndarray,
+                     shape: Tuple[int, ...], extents: Tuple[float, ...],
+                     sigma: float) -> np.ndarray:
+    """
+    Раскладывает частоты точек по ближайшим узлам регулярной сетки
+    и сглаживает результат гауссовым фильтром.
+
+    Параметры:
+    -----------
+    scaled_points : np.ndarray
+        Массив (N, dims) масштабированных координат.
+    frequencies : np.ndarray
+        Нормализованные частоты для каждой точки.
+    shape : Tuple[int, ...]
+        Размер сетки по каждой оси.
+    extents : Tuple[float, ...]
+        Максимальная координата по каждой оси.
+    sigma : float
+        Параметр сглаживания гауссова фильтра.
+
+    Возвращает:
+    --------
+    np.ndarray
+        Сетка значений указанной формы.
+    """
+    grid = np.zeros(shape)
+    indices = []
+    for axis, (size, extent) in enumerate(zip(shape, extents)):
+        if extent > 0:
+            idx = np.floor(scaled_points[:, axis] * (size - 1) / extent).astype(np.intp)
+        else:
+            idx = np.zeros(len(scaled_points), dtype=np.intp)
+        indices.append(idx)
+    np.add.at(grid, tuple(indices), frequencies)
+    grid = gaussian_filter(grid, sigma=sigma)
+    # Возвращаем значения к диапазону [0, 1]: сглаживание размывает максимум,
+    # а потребители (изоповерхности, контуры) ожидают нормализованную сетку
+    grid_max = grid.max()
+    if grid_max > 0:
+        grid /= grid_max
+    return grid
+
+
+def compute_limit_shape(cell_counts: Union[Dict[Tuple, int], Tuple[np.ndarray, ...]],
                         scaling_factor: Optional[float] = None,
                         dimensions: int = 2) -> Tuple:
     """
     Вычисление предельной формы на основе накопленных данных.
-    
+
     Параметры:
     -----------
-    cell_counts : Dict[Tuple, int]
-        Словарь с координатами ячеек в качестве ключей и количеством в качестве значений.
+    cell_counts : Dict[Tuple, int] | Tuple[np.ndarray, ...]
+        Счетчики ячеек: словарь с координатами в качестве ключей либо
+        колоночный (SoA) кортеж массивов координат и счетчиков —
+        как возвращает cells_soa() симуляторов.
     scaling_factor : float, optional
         Коэффициент масштабирования. Если None, используется sqrt(n) для 2D или cbrt(n) для 3D.
     dimensions : int
         Количество измерений (2 или 3).
-        
+
     Возвращает:
     --------
     Кортеж координат сетки и интерполированных значений.
-    
+
     Исключения:
     --------
     ValueError: Если нет данных для вычисления или указано неверное количество измерений.
     """
-    if not cell_counts:
-        raise ValueError("Нет данных для вычисления предельной формы")
-    
     if dimensions not in [2, 3]:
         raise ValueError(f"Неподдерживаемое количество измерений: {dimensions}. Поддерживаются только 2D и 3D.")
-    
-    # Определение коэффициента масштабирования
+
+    # Колоночный вход используется напрямую, словарь конвертируется
+    # в непрерывные массивы — дальше работает скомпилированный код
+    if isinstance(cell_counts, tuple):
+        coords_arr = np.ascontiguousarray(
+            np.stack(cell_counts[:-1], axis=1).astype(np.int32))
+        counts_arr = cell_counts[-1].astype(np.float64)
+    elif cell_counts:
+        coords_arr = np.asarray(list(cell_counts.keys()), dtype=np.int32)
+        counts_arr = np.asarray(list(cell_counts.values()), dtype=np.float64)
+    else:
+        coords_arr = np.empty((0, dimensions), dtype=np.int32)
+        counts_arr = np.empty(0)
+
+    if len(counts_arr) == 0:
+        raise ValueError("Нет данных для вычисления предельной формы")
+
+    # Определение коэффициента масштабирования: n — максимальная сумма
+    # координат, один векторизованный проход
     if scaling_factor is None:
-        if dimensions == 2:
-            n = max(x + y for x, y in cell_counts.keys())
-            scaling_factor = np.sqrt(n)
-        elif dimensions == 3:
-            n = max(x + y + z for x, y, z in cell_counts.keys())
-            scaling_factor = np.cbrt(n)
-    
+        n = int(coords_arr.sum(axis=1).max())
+        scaling_factor = np.sqrt(n) if dimensions == 2 else np.cbrt(n)
+
     # Проверка на положительность масштабного коэффициента
     if scaling_factor <= 0:
         raise ValueError(f"Коэффициент масштабирования должен быть положительным, получено: {scaling_factor}")
-    
+
     # Масштабирование координат и нормализация частот
-    scaled_points = []
-    frequencies = []
-    max_freq = max(cell_counts.values())
-    
-    for coords, count in cell_counts.items():
-        scaled_coords = [c/scaling_factor for c in coords]
-        scaled_points.append(scaled_coords)
-        frequencies.append(count/max_freq)
-    
-    scaled_points = np.array(scaled_points)
-    
+    scaled_points, frequencies = _scale(coords_arr, counts_arr, float(scaling_factor))
+
+    # Точки уже лежат на целочисленной решетке, поэтому вместо
+    # неструктурированной интерполяции (триангуляция в griddata) частоты
+    # раскладываются напрямую в ближайшие узлы регулярной сетки и
+    # сглаживаются гауссовым фильтром — плотная свертка вместо
+    # перестроения триангуляции на каждый вызов
     if dimensions == 2:
-        # Создание регулярной сетки для интерполяции
-        x_max = max(p[0] for p in scaled_points)
-        y_max = max(p[1] for p in scaled_points)
-        grid_x, grid_y = np.mgrid[0:x_max:100j, 0:y_max:100j]
-        
-        # Интерполяция данных
-        grid_z = griddata(scaled_points, frequencies, (grid_x, grid_y), method='cubic', fill_value=0)
-        
+        # Создание регулярной сетки: sparse-сетка хранит по одной оси
+        # и разворачивается броадкастом, вместо двух плотных массивов 100x100
+        x_max = scaled_points[:, 0].max()
+        y_max = scaled_points[:, 1].max()
+        grid_x, grid_y = np.meshgrid(
+            np.linspace(0, x_max, 100), np.linspace(0, y_max, 100),
+            indexing='ij', sparse=True)
+
+        # Раскладываем частоты по узлам сетки и сглаживаем
+        grid_z = _scatter_on_grid(scaled_points, frequencies, (100, 100),
+                                  (x_max, y_max), sigma=1.5)
+
         return grid_x, grid_y, grid_z
-    
+
     elif dimensions == 3:
-        # Создание регулярной сетки для 3D интерполяции
-        x_max = max(p[0] for p in scaled_points)
-        y_max = max(p[1] for p in scaled_points)
-        z_max = max(p[2] for p in scaled_points)
-        grid_x, grid_y, grid_z = np.mgrid[0:x_max:50j, 0:y_max:50j, 0:z_max:50j]
-        
-        # Интерполяция данных
-        grid_v = griddata(scaled_points, frequencies, (grid_x, grid_y, grid_z), method='linear', fill_value=0)
-        
+        # Создание регулярной сетки для 3D: sparse-сетка экономит ~3 МБ
+        # на трех плотных массивах 50x50x50
+        x_max = scaled_points[:, 0].max()
+        y_max = scaled_points[:, 1].max()
+        z_max = scaled_points[:, 2].max()
+        grid_x, grid_y, grid_z = np.meshgrid(
+            np.linspace(0, x_max, 50), np.linspace(0, y_max, 50),
+            np.linspace(0, z_max, 50), indexing='ij', sparse=True)
+
+        # Раскладываем частоты по узлам сетки и сглаживаем
+        grid_v = _scatter_on_grid(scaled_points, frequencies, (50, 50, 50),
+                                  (x_max, y_max, z_max), sigma=1.0)
+
         return grid_x, grid_y, grid_z, grid_v
@@ -1,22 +1,62 @@
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, Tuple, List, Set, Optional, Union, Any
 import os
-import sys
 import pickle
 import logging
 
-# Add parent directory to path to allow imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from common.utils import save_cells_to_file, compute_limit_shape
-from diagrams2d.young_diagram import Diagram2D
+from .young_diagram import Diagram2D
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=32)
+def _mesh_coords(max_x: int, max_y: int,
+                 cell_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Координаты границ ячеек и тики осей для pcolormesh.
+
+    Зависят только от размеров диаграммы и cell_size — при серии
+    визуализаций одного размера массивы берутся из кэша.
+    """
+    return (np.arange(max_x + 1) * cell_size / max_x,
+            np.arange(max_y + 1) * cell_size / max_y,
+            np.linspace(0, cell_size, min(11, max_x + 1)),
+            np.linspace(0, cell_size, min(11, max_y + 1)))
+
+
+def _one_run(n_steps: int, alpha: float,
+             initial_cells: Optional[Set[Tuple[int, int]]]) -> np.ndarray:
+    """
+    Выполняет один независимый прогон симуляции в дочернем процессе.
+
+    Возвращает ячейки диаграммы массивом (N, 2) — он пиклится одним
+    блоком памяти, без пообъектной сериализации кортежей.
+    """
+    diagram = Diagram2D(initial_cells)
+    diagram.simulate(n_steps=n_steps, alpha=alpha)
+    return np.asarray(list(diagram.cells), dtype=np.int64)
+
+
+# Пользовательская цветовая карта для visualize: серый (фон) -> белый ->
+# светло-красный -> красный. Строится один раз при импорте модуля, а не
+# на каждый вызов (интерполяция 256 узлов не бесплатна)
+_CUSTOM_CMAP = LinearSegmentedColormap.from_list(
+    'grey_to_red',
+    [(0.94, 0.94, 0.94, 0), (1, 1, 1, 0.2), (1, 0.8, 0.8, 0.6), (0.8, 0, 0, 1)],
+    N=256)
+# Пустые ячейки кодируются NaN и рисуются прозрачными — без параллельного
+# массива маски и медленного masked-array-пути в pcolormesh
+_CUSTOM_CMAP.set_bad(alpha=0)
+
+
 # Конфигурация визуализации
 class VisualizationConfig:
     """
@@ -39,11 +79,65 @@ class DiagramSimulator2D:
         """
         Инициализируем с пустым значением
         """
+        # Счетчики агрегируются в плотной int64-сетке (индексация вместо
+        # хэширования кортежей); словарь материализуется лениво по запросу
+        self._count_grid: Optional[np.ndarray] = None
         self.total_cell_counts = defaultdict(int)  # словарь для подсчета количества дубликатов в каждой ячейке
-        
-    def simulate(self, n_steps: int = 1000, alpha: float = 1.0, runs: int = 10, 
+
+    @property
+    def total_cell_counts(self) -> Union[Dict[Tuple[int, int], int], Tuple[np.ndarray, ...]]:
+        """
+        Счетчики ячеек в виде словаря {(x, y): count}.
+
+        Материализуется из плотной сетки лениво — горячие пути (cells_soa,
+        визуализация) работают с сеткой напрямую и словарь не строят.
+        """
+        if self._total_cell_counts is None:
+            counts = defaultdict(int)
+            if self._count_grid is not None:
+                xs, ys = np.nonzero(self._count_grid)
+                counts.update(zip(zip(xs.tolist(), ys.tolist()),
+                                  self._count_grid[xs, ys].tolist()))
+            self._total_cell_counts = counts
+        return self._total_cell_counts
+
+    @total_cell_counts.setter
+    def total_cell_counts(self, value) -> None:
+        self._total_cell_counts = value
+        self._count_grid = None
+
+    def _has_cells(self) -> bool:
+        """
+        Проверяет наличие накопленных счетчиков, не материализуя словарь
+        из плотной сетки (guard-путь визуализаций должен оставаться O(1)).
+        """
+        return self._count_grid is not None or bool(self._total_cell_counts)
+
+    def _accumulate_run(self, cells: Union[Set[Tuple[int, int]], np.ndarray]) -> None:
+        """Добавляет ячейки завершенного прогона в плотную сетку счетчиков."""
+        if isinstance(cells, np.ndarray):
+            arr = cells
+        else:
+            arr = np.asarray(list(cells), dtype=np.int64)
+        max_x = int(arr[:, 0].max()) + 1
+        max_y = int(arr[:, 1].max()) + 1
+        if self._count_grid is None:
+            self._count_grid = np.zeros((max_x, max_y), dtype=np.int64)
+        elif self._count_grid.shape[0] < max_x or self._count_grid.shape[1] < max_y:
+            # Расширяем сетку до объединенной границы прогонов
+            grid = np.zeros((max(max_x, self._count_grid.shape[0]),
+                             max(max_y, self._count_grid.shape[1])), dtype=np.int64)
+            grid[:self._count_grid.shape[0], :self._count_grid.shape[1]] = self._count_grid
+            self._count_grid = grid
+        # Ячейки одного прогона уникальны — достаточно fancy-index инкремента
+        self._count_grid[arr[:, 0], arr[:, 1]] += 1
+        # Ленивый словарь устарел
+        self._total_cell_counts = None
+
+    def simulate(self, n_steps: int = 1000, alpha: float = 1.0, runs: int = 10,
                  initial_cells: Optional[Set[Tuple[int, int]]] = None,
-                 callback: Optional[callable] = None) -> None:
+                 callback: Optional[callable] = None,
+                 max_workers: Optional[int] = None) -> None:
         """
         Выполняет симуляцию роста диаграммы 2D.
 
@@ -59,6 +153,10 @@ class DiagramSimulator2D:
             Начальный набор ячеек для симуляции.
         callback : callable, optional
             Функция, которая вызывается после каждого шага с текущим состоянием.
+        max_workers : int, optional
+            Количество процессов для параллельных прогонов. По умолчанию
+            используется число ядер; max_workers=1 отключает пул (например,
+            когда вызывающий код уже распределил прогоны по процессам).
 
         Возвращает:
         -----------
@@ -74,16 +172,39 @@ class DiagramSimulator2D:
         if runs <= 0:
             raise ValueError("Количество симуляций должно быть положительным числом")
         
-        # Обновляем счетчик для новой симуляции
+        # Сбрасываем счетчики для новой симуляции
         self.total_cell_counts = defaultdict(int)
-        
+
+        # Прогоны независимы — без callback раскладываем их по процессам
+        # и сливаем результаты в общую сетку счетчиков
+        workers = min(runs, max_workers if max_workers is not None
+                      else (os.cpu_count() or 1))
+        if callback is None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_one_run, n_steps, alpha, initial_cells)
+                           for _ in range(runs)]
+                for run, future in enumerate(futures, start=1):
+                    try:
+                        cells_arr = future.result()
+                    except Exception as e:
+                        logger.error("Ошибка в симуляции %d: %s", run, e)
+                        raise
+                    self._accumulate_run(cells_arr)
+                    logger.info('Симуляция %d завершена. Размер диаграммы: %d клеток.', run, len(cells_arr))
+            return
+
         for run in range(1, runs + 1):
             # Создаем новую диаграмму на каждый запуск
             diagram = Diagram2D(initial_cells)
             
-            # Отслеживаем рост диаграммы в реальном времени
-            def growth_callback(diagram, step):
-                if callback:
+            # Отслеживаем рост диаграммы в реальном времени.
+            # Без внешнего callback не устанавливаем и внутренний:
+            # O(N)-копия счетчиков на каждом шаге не делается, а диаграмма
+            # может использовать скомпилированное ядро роста
+            if callback is None:
+                growth_callback = None
+            else:
+                def growth_callback(diagram, step):
                     # Сохраняем текущее состояние для внешнего вызова
                     temp_counts = self.total_cell_counts.copy()
                     for cell in diagram.cells:
@@ -94,19 +215,54 @@ class DiagramSimulator2D:
                 # Запускаем симуляцию
                 diagram.simulate(n_steps=n_steps, alpha=alpha, callback=growth_callback)
                 
-                # Обновляем счетчик для каждой ячейки в диаграмме
-                for cell in diagram.cells:
-                    self.total_cell_counts[cell] += 1
-                    
-                logger.info(f'Симуляция {run} завершена. Размер диаграммы: {len(diagram.cells)} клеток.')
+                # Обновляем счетчики одним векторизованным инкрементом сетки
+                self._accumulate_run(diagram.cells)
+
+
+                logger.info('Симуляция %d завершена. Размер диаграммы: %d клеток.', run, len(diagram.cells))
             except Exception as e:
-                logger.error(f"Ошибка в симуляции {run}: {str(e)}")
+                logger.error("Ошибка в симуляции %d: %s", run, e)
                 raise
-    
-    def visualize(self, filename: Optional[str] = None, 
-              cell_size: int = VisualizationConfig.DEFAULT_CELL_SIZE, 
+
+    def cells_soa(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Возвращает накопленные счетчики ячеек в колоночном (SoA) виде.
+
+        Колонки — непрерывные NumPy-массивы, которые дешево пиклятся,
+        хэшируются и сериализуются без промежуточных Python-объектов.
+
+        Возвращает:
+        -----------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            Массивы координат x, y и счетчиков одинаковой длины.
+        """
+        # Быстрый путь: колонки извлекаются прямо из плотной сетки
+        if self._count_grid is not None and self._total_cell_counts is None:
+            xs, ys = np.nonzero(self._count_grid)
+            return (np.ascontiguousarray(xs.astype(np.int64)),
+                    np.ascontiguousarray(ys.astype(np.int64)),
+                    np.ascontiguousarray(self._count_grid[xs, ys]))
+
+        counts_src = self.total_cell_counts
+        if isinstance(counts_src, tuple):
+            # Счетчики уже присвоены извне в колоночном виде
+            return counts_src
+
+        n = len(counts_src)
+        keys = np.fromiter(counts_src.keys(),
+                           dtype=np.dtype((np.int64, 2)), count=n)
+        counts = np.fromiter(counts_src.values(),
+                             dtype=np.int64, count=n)
+        if n == 0:
+            keys = keys.reshape(0, 2)
+        return (np.ascontiguousarray(keys[:, 0]),
+                np.ascontiguousarray(keys[:, 1]),
+                counts)
+
+    def visualize(self, filename: Optional[str] = None,
+              cell_size: int = VisualizationConfig.DEFAULT_CELL_SIZE,
               grid: bool = VisualizationConfig.DEFAULT_GRID,
-              min_color_value: float = 0.5) -> plt.Figure:
+              min_color_value: float = 0.5) -> Figure:
         """
         Визуализирует результаты симуляции.
 
@@ -123,81 +279,73 @@ class DiagramSimulator2D:
             
         Возвращает:
         -----------
-        plt.Figure
+        Figure
             Объект фигуры matplotlib для дальнейшей настройки или отображения.
-            
+
         Исключения:
         -----------
         ValueError: Если нет клеток для отображения.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
             
-        # Определяем максимальные координаты для построения сетки
-        max_x = max(x for x, _ in self.total_cell_counts.keys()) + 1
-        max_y = max(y for _, y in self.total_cell_counts.keys()) + 1
+        # Извлекаем колонки один раз; максимумы и заполнение сетки
+        # выполняются векторизованно, без цикла по ячейкам
+        xs, ys, counts = self.cells_soa()
+        max_x = int(xs.max()) + 1
+        max_y = int(ys.max()) + 1
 
-        # Создаем сетку значений для улучшенного отображения
+        # Создаем сетку значений для улучшенного отображения: одно
+        # fancy-index присваивание нормализованных частот с масштабированием,
+        # чтобы малые вероятности были лучше видны
         grid_data = np.zeros((max_x, max_y))
-        max_count = max(self.total_cell_counts.values())
-
-        # Заполняем сетку нормализованными частотами
-        for (x, y), count in self.total_cell_counts.items():
-            normalized_count = count / max_count
-            # Применяем масштабирование, чтобы малые вероятности были лучше видны
-            adjusted_value = min_color_value + (1.0 - min_color_value) * normalized_count
-            grid_data[x, y] = adjusted_value  # Не инвертируем значения
-
-        # Создаем фигуру с белым/серым фоном
-        plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE, facecolor='white')
-        ax = plt.gca()
+        grid_data[xs, ys] = min_color_value + (1.0 - min_color_value) * (counts / counts.max())
+
+        # Создаем фигуру через объектный API: без pyplot нет глобального
+        # реестра фигур и GUI-бэкенда, рендеринг идет прямо в Agg-канву
+        fig = Figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE, facecolor='white')
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
         ax.set_facecolor('#f0f0f0')  # Светло-серый фон для графика
 
-        # Создаем пользовательскую цветовую карту - от светло-серого к красному
-        from matplotlib.colors import LinearSegmentedColormap
-        # Градиент: серый (фон) -> белый -> светло-красный -> красный
-        colors = [(0.94, 0.94, 0.94, 0), (1, 1, 1, 0.2), (1, 0.8, 0.8, 0.6), (0.8, 0, 0, 1)]
-        custom_cmap = LinearSegmentedColormap.from_list('grey_to_red', colors, N=256)
+        # Нулевые значения превращаем в NaN: colormap помечает их как "bad"
+        # и рисует прозрачными
+        grid_data[grid_data == 0] = np.nan
 
-        # Маскируем нулевые значения для прозрачности
-        masked_data = np.ma.masked_where(grid_data == 0, grid_data)
+        # Координаты сетки и тики зависят только от размеров — берем из кэша
+        mesh_x, mesh_y, xticks, yticks = _mesh_coords(max_x, max_y, cell_size)
 
         # Используем pcolormesh для более качественного отображения
-        mesh = plt.pcolormesh(np.arange(max_x + 1) * cell_size / max_x, 
-                                np.arange(max_y + 1) * cell_size / max_y,
-                                masked_data.T,  # Транспонируем для правильной ориентации
-                                cmap=custom_cmap,
-                                edgecolors='none', 
-                                shading='flat')
+        mesh = ax.pcolormesh(mesh_x, mesh_y,
+                             grid_data.T,  # Транспонируем для правильной ориентации
+                             cmap=_CUSTOM_CMAP,
+                             edgecolors='none',
+                             shading='flat')
 
-        plt.colorbar(mesh, label='Частота появления ячейки')
-        plt.gca().set_aspect('equal', adjustable='box')
+        fig.colorbar(mesh, ax=ax, label='Частота появления ячейки')
+        ax.set_aspect('equal', adjustable='box')
 
         # Настраиваем оси
-        xticks = np.linspace(0, cell_size, min(11, max_x + 1))
-        yticks = np.linspace(0, cell_size, min(11, max_y + 1))
-        plt.xticks(xticks)
-        plt.yticks(yticks)
+        ax.set_xticks(xticks)
+        ax.set_yticks(yticks)
 
-        plt.xlabel('x')
-        plt.ylabel('y')
-        plt.title('Накопленная диаграмма Юнга (2D)')
+        ax.set_xlabel('x')
+        ax.set_ylabel('y')
+        ax.set_title('Накопленная диаграмма Юнга (2D)')
 
         if grid:
-            plt.grid(True, linestyle='-', linewidth=0.5, alpha=0.3, color='#cccccc')
-            
+            ax.grid(True, linestyle='-', linewidth=0.5, alpha=0.3, color='#cccccc')
+
         if filename:
             try:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, 
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI,
                             bbox_inches='tight', facecolor='white')
                 logger.info(f"Изображение сохранено: {filename}")
             except Exception as e:
                 logger.error(f"Ошибка при сохранении изображения {filename}: {str(e)}")
                 raise
-            
-        plt.show()
 
-        return plt.gcf()
+        return fig
 
     
     def save_cells(self, filename: str) -> None:
@@ -220,8 +368,9 @@ class DiagramSimulator2D:
             logger.error(f"Ошибка при сохранении данных в {filename}: {str(e)}")
             raise
 
-    def limit_shape_visualize(self, filename: Optional[str] = None, 
-                             levels: int = VisualizationConfig.DEFAULT_CONTOUR_LEVELS) -> plt.Figure:
+    def limit_shape_visualize(self, filename: Optional[str] = None,
+                             levels: int = VisualizationConfig.DEFAULT_CONTOUR_LEVELS,
+                             fig: Optional[Figure] = None) -> Figure:
         """
         Визуализирует результаты симуляции в виде предельной формы.
         
@@ -231,49 +380,60 @@ class DiagramSimulator2D:
             Имя файла для сохранения визуализации.
         levels : int, default=10
             Количество уровней для контура.
-            
+        fig : Figure, optional
+            Переиспользуемая фигура. Если не указана, создается новая.
+
         Возвращает:
         -----------
-        plt.Figure
+        Figure
             Объект фигуры matplotlib.
             
         Исключения:
         -----------
         ValueError: Если нет клеток для отображения.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
             
         try:
             # Вычисляем предельную форму
+            # Счетчики передаются SoA-колонками: словарь из сетки
+            # не материализуется
             grid_x, grid_y, grid_z = compute_limit_shape(
-                self.total_cell_counts, dimensions=2)
-            
-            plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
-            
-            # Plot contour graph
-            contour = plt.contour(grid_x, grid_y, grid_z, levels=levels)
-            plt.clabel(contour, inline=True, fontsize=8)
+                self.cells_soa(), dimensions=2)
             
+            # Переиспользуем фигуру, если она передана (например, из пула),
+            # чтобы не выделять новый RGBA-буфер на каждый запрос
+            if fig is None:
+                fig = Figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
+                FigureCanvasAgg(fig)
+            else:
+                fig.clear()
+                fig.set_size_inches(*VisualizationConfig.DEFAULT_FIGURE_SIZE)
+            ax = fig.add_subplot(1, 1, 1)
+
+            # Plot contour graph (сетка sparse, поэтому передаем 1-D оси;
+            # contour ожидает Z формы (len(y), len(x)) — транспонируем)
+            contour = ax.contour(grid_x.ravel(), grid_y.ravel(), grid_z.T, levels=levels)
+            ax.clabel(contour, inline=True, fontsize=8)
+
             # Add heatmap
-            plt.imshow(grid_z.T, extent=[0, grid_x.max(), 0, grid_y.max()],
-                      origin='lower', cmap=VisualizationConfig.DEFAULT_COLORMAP_DENSITY, alpha=0.5)
-            
-            plt.colorbar(label='Нормализованная частота')
-            plt.xlabel('x/√n')
-            plt.ylabel('y/√n')
-            plt.title('Предельная форма диаграммы Юнга 2D')
-            plt.axis('equal')
-            plt.grid(True)
-            
+            im = ax.imshow(grid_z.T, extent=[0, grid_x.max(), 0, grid_y.max()],
+                           origin='lower', cmap=VisualizationConfig.DEFAULT_COLORMAP_DENSITY, alpha=0.5)
+
+            fig.colorbar(im, ax=ax, label='Нормализованная частота')
+            ax.set_xlabel('x/√n')
+            ax.set_ylabel('y/√n')
+            ax.set_title('Предельная форма диаграммы Юнга 2D')
+            ax.axis('equal')
+            ax.grid(True)
+
             if filename:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
                 logger.info(f"Изображение предельной формы сохранено: {filename}")
-                
-            plt.show()
-            
+
             # Return the figure for web API usage
-            return plt.gcf()
+            return fig
         
         except Exception as e:
             logger.error(f"Ошибка при визуализации предельной формы: {str(e)}")
@@ -288,27 +448,27 @@ class DiagramSimulator2D:
         Dict
             Данные диаграммы в формате JSON.
         """
-        if not self.total_cell_counts:
+        # Один проход по колонкам: максимумы и нормализация векторизованы,
+        # вместо трех обходов словаря генераторами
+        xs, ys, counts = self.cells_soa()
+        if len(counts) == 0:
             return {"error": "Нет доступных данных. Сначала выполните симуляцию."}
-            
-        cells_data = []
-        max_count = max(self.total_cell_counts.values())
-        
-        for (x, y), count in self.total_cell_counts.items():
-            normalized_count = count / max_count
-            cells_data.append({
-                "x": x,
-                "y": y,
-                "count": count,
-                "normalized_count": normalized_count
-            })
-            
+
+        max_count = int(counts.max())
+        normalized = counts / max_count
+
+        cells_data = [
+            {"x": x, "y": y, "count": count, "normalized_count": norm}
+            for x, y, count, norm in zip(xs.tolist(), ys.tolist(),
+                                         counts.tolist(), normalized.tolist())
+        ]
+
         return {
             "cells": cells_data,
             "max_count": max_count,
             "dimensions": {
-                "max_x": max(x for x, _ in self.total_cell_counts.keys()) + 1,
-                "max_y": max(y for _, y in self.total_cell_counts.keys()) + 1
+                "max_x": int(xs.max()) + 1,
+                "max_y": int(ys.max()) + 1
             }
         }
         
@@ -325,12 +485,17 @@ class DiagramSimulator2D:
         -----------
         Exception: При ошибке сохранения состояния.
         """
-        state = {
-            "total_cell_counts": dict(self.total_cell_counts)
-        }
         try:
+            # Компактный колоночный формат: три массива вместо пикла словаря
+            # кортежей — меньше файл и нет пообъектной сериализации
+            xs, ys, counts = self.cells_soa()
+            # Пишем в открытый дескриптор, чтобы np.savez не дописывал
+            # расширение .npz к переданному имени файла
             with open(filename, 'wb') as f:
-                pickle.dump(state, f)
+                np.savez_compressed(f,
+                                    xs=xs.astype(np.int32),
+                                    ys=ys.astype(np.int32),
+                                    counts=counts)
             logger.info(f"Состояние симуляции сохранено в файл: {filename}")
         except Exception as e:
             logger.error(f"Ошибка при сохранении состояния в {filename}: {str(e)}")
@@ -351,8 +516,15 @@ class DiagramSimulator2D:
         FileNotFoundError: Если файл не найден.
         """
         try:
-            with open(filename, 'rb') as f:
-                state = pickle.load(f)
+            try:
+                data = np.load(filename)
+                self.total_cell_counts = defaultdict(int, zip(
+                    zip(data['xs'].tolist(), data['ys'].tolist()),
+                    data['counts'].tolist()))
+            except (ValueError, pickle.UnpicklingError):
+                # Старый формат: состояние целиком запиклено словарем
+                with open(filename, 'rb') as f:
+                    state = pickle.load(f)
                 self.total_cell_counts = defaultdict(int, state["total_cell_counts"])
             logger.info(f"Состояние симуляции загружено из файла: {filename}")
         except FileNotFoundError:
@@ -1,9 +1,113 @@
-import random
+import numpy as np
 from typing import Set, Tuple, List, Dict, Optional, Union
 import logging
 
+try:
+    from numba import njit, types as _nb_types
+    from numba.typed import Dict as _NumbaDict
+except ImportError:  # Numba опциональна: без неё работает путь на Python
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+
+def _try_add(member, add_pos, add_x, add_y, k, cx, cy):
+    """
+    Добавляет кандидата (cx, cy) во фронт роста, если его еще нет
+    ни в диаграмме, ни во фронте, и у него есть опоры снизу и слева.
+    Возвращает новый размер фронта.
+    """
+    key = (cx << 32) | cy
+    if key in member or key in add_pos:
+        return k
+    if cy > 0 and ((cx << 32) | (cy - 1)) not in member:
+        return k
+    if cx > 0 and (((cx - 1) << 32) | cy) not in member:
+        return k
+    add_x[k] = cx
+    add_y[k] = cy
+    add_pos[key] = k
+    return k + 1
+
+
+if njit is not None:
+    _try_add = njit(cache=True)(_try_add)
+
+
+def _simulate_core(init_x: np.ndarray, init_y: np.ndarray,
+                   n_steps: int, alpha: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ядро симуляции роста на упакованных int64-ключах ((x << 32) | y).
+
+    Членство и фронт добавляемых ячеек хранятся в словарях с целыми
+    ключами вместо множеств кортежей — под Numba это C-уровневые
+    хэш-операции без создания Python-объектов. Возвращает массивы
+    координат всех ячеек; если рост остановился раньше, массивы короче
+    ожидаемого (вызывающий код поднимает исключение).
+    """
+    np.random.seed(seed)
+    n0 = init_x.shape[0]
+    total = n0 + n_steps
+
+    # Типизированный словарь членства с упакованными ключами
+    member = _NumbaDict.empty(_nb_types.int64, _nb_types.boolean)
+
+    xs = np.empty(total, np.int64)
+    ys = np.empty(total, np.int64)
+    for i in range(n0):
+        xs[i] = init_x[i]
+        ys[i] = init_y[i]
+        member[(init_x[i] << 32) | init_y[i]] = True
+    n = n0
+
+    # Фронт добавляемых ячеек: массивы координат + словарь key -> позиция
+    # для удаления обменом с последним элементом
+    add_x = np.empty(2 * total + 2, np.int64)
+    add_y = np.empty(2 * total + 2, np.int64)
+    add_pos = _NumbaDict.empty(_nb_types.int64, _nb_types.int64)
+    k = 0
+
+    for i in range(n0):
+        k = _try_add(member, add_pos, add_x, add_y, k, init_x[i] + 1, init_y[i])
+        k = _try_add(member, add_pos, add_x, add_y, k, init_x[i], init_y[i] + 1)
+
+    for step in range(n_steps):
+        if k == 0:
+            break
+
+        # Веса S(c) = ((x+1)(y+1)) ** alpha и выбор по инверсии CDF
+        weights = ((add_x[:k] + 1) * (add_y[:k] + 1)).astype(np.float64) ** alpha
+        cumulative = np.cumsum(weights)
+        idx = int(np.searchsorted(cumulative, np.random.random() * cumulative[-1]))
+        if idx >= k:
+            idx = k - 1
+
+        cx = add_x[idx]
+        cy = add_y[idx]
+        key = (cx << 32) | cy
+
+        # Удаляем выбранную ячейку из фронта обменом с последней
+        k -= 1
+        del add_pos[key]
+        if idx < k:
+            add_x[idx] = add_x[k]
+            add_y[idx] = add_y[k]
+            add_pos[(add_x[k] << 32) | add_y[k]] = idx
+
+        member[key] = True
+        xs[n] = cx
+        ys[n] = cy
+        n += 1
+
+        k = _try_add(member, add_pos, add_x, add_y, k, cx + 1, cy)
+        k = _try_add(member, add_pos, add_x, add_y, k, cx, cy + 1)
+
+    return xs[:n], ys[:n]
+
+
+if njit is not None:
+    _simulate_core = njit(cache=True)(_simulate_core)
+
 class Diagram2D:
     """
     Класс, представляющий 2D диаграмму Юнга с возможностями симуляции роста.
@@ -18,52 +122,78 @@ class Diagram2D:
             Начальный набор ячеек. Если None, начинается с ячейки (0, 0).
         """
         self.cells: Set[Tuple[int, int]] = initial_cells if initial_cells else {(0, 0)}
-        # Для оптимизации будем отслеживать граничные ячейки
-        self._boundary_cells: Set[Tuple[int, int]] = self._calculate_boundary_cells()
+        # Параллельное SoA-хранилище: колонки координат растут удвоением
+        # и позволяют векторизовать проверки соседей без обхода множества
+        capacity = max(16, 2 * len(self.cells))
+        self._xs = np.empty(capacity, np.int64)
+        self._ys = np.empty(capacity, np.int64)
+        # Упакованные ключи (x << 32) | y поддерживаются параллельно
+        # колонкам — проверки членства не перепаковывают координаты
+        self._keys = np.empty(capacity, np.int64)
+        self._n = 0
+        for x, y in self.cells:
+            self._xs[self._n] = x
+            self._ys[self._n] = y
+            self._keys[self._n] = (x << 32) | y
+            self._n += 1
+        # Фронт роста поддерживается инкрементально: add_cell правит его
+        # за O(1), полный пересчет нужен только при инициализации
+        self._addable: Set[Tuple[int, int]] = self._calculate_addable_cells()
+        # Один генератор на диаграмму: избегаем глобального состояния random
+        self._rng = np.random.default_rng()
+        # Кэш весов по площади (x+1)(y+1): одна и та же площадь встречается
+        # многократно, а pow с дробным показателем — самая дорогая операция
+        self._weight_cache: Dict[int, float] = {}
+        self._weight_cache_alpha: float = 1.0
         
-    def _calculate_boundary_cells(self) -> Set[Tuple[int, int]]:
+    def _calculate_addable_cells(self) -> Set[Tuple[int, int]]:
         """
-        Определяет граничные ячейки диаграммы, которые могут иметь новые добавляемые соседи.
-        
+        Полный пересчет фронта роста по текущим ячейкам диаграммы.
+
+        Кандидаты — правые и верхние соседи всех ячеек; проверки членства
+        (сам кандидат, опора снизу, сосед слева) выполняются одним np.isin
+        по упакованным int64-ключам вместо питоновских in-тестов.
+
         Возвращает:
         --------
         Set[Tuple[int, int]]
-            Множество граничных ячеек.
+            Множество ячеек, которые можно добавить к диаграмме.
         """
-        boundary = set()
-        for x, y in self.cells:
-            # Ячейки, которые находятся на правой или верхней границе
-            if (x + 1, y) not in self.cells or (x, y + 1) not in self.cells:
-                boundary.add((x, y))
-        return boundary
-    
+        xs = self._xs[:self._n]
+        ys = self._ys[:self._n]
+        cand_x = np.concatenate([xs + 1, xs])
+        cand_y = np.concatenate([ys, ys + 1])
+
+        member_keys = self._keys[:self._n]
+        queries = np.concatenate([
+            (cand_x << 32) | cand_y,            # сам кандидат
+            (cand_x << 32) | (cand_y - 1),      # опора снизу
+            ((cand_x - 1) << 32) | cand_y,      # сосед слева
+        ])
+        hits = np.isin(queries, member_keys)
+
+        m = len(cand_x)
+        in_diagram = hits[:m]
+        below = hits[m:2 * m]
+        left = hits[2 * m:]
+        mask = ~in_diagram & ((cand_y == 0) | below) & ((cand_x == 0) | left)
+
+        return set(zip(cand_x[mask].tolist(), cand_y[mask].tolist()))
+
     def get_addable_cells(self) -> Set[Tuple[int, int]]:
         """
         Находит все ячейки, которые можно добавить к диаграмме согласно правилам диаграммы Юнга.
         Ячейка может быть добавлена, если у неё есть соседи слева и снизу.
-        
+
+        Фронт поддерживается инкрементально в add_cell, поэтому вызов
+        возвращает готовое множество без пересчета.
+
         Возвращает:
         --------
         Set[Tuple[int, int]]
             Набор координат (x, y), которые можно добавить к диаграмме.
         """
-        addable_cells = set()
-        # Используем только граничные ячейки для оптимизации
-        for x, y in self._boundary_cells:
-            # Возможные новые ячейки справа и сверху
-            neighbors = [(x + 1, y), (x, y + 1)]
-            for nx, ny in neighbors:
-                # Если соседняя ячейка еще не в диаграмме
-                if (nx, ny) in self.cells:
-                    continue
-
-                # Проверяем, есть ли у неё поддержка снизу и слева
-                has_support_below = ny == 0 or (nx, ny - 1) in self.cells
-                has_left_neighbor = nx == 0 or (nx - 1, ny) in self.cells
-                if has_support_below and has_left_neighbor:
-                    addable_cells.add((nx, ny))
-                    
-        return addable_cells
+        return self._addable
     
     def calculate_weight(self, cell: Tuple[int, int], alpha: float = 1.0) -> float:
         """
@@ -89,20 +219,52 @@ class Diagram2D:
         """
         x, y = cell
         total = (x + 1) * (y + 1)  # Площадь прямоугольника
-        return total ** alpha
+
+        # Вес зависит только от площади — мемоизируем pow по ней;
+        # при смене alpha кэш сбрасывается
+        if alpha != self._weight_cache_alpha:
+            self._weight_cache.clear()
+            self._weight_cache_alpha = alpha
+        weight = self._weight_cache.get(total)
+        if weight is None:
+            weight = total ** alpha
+            self._weight_cache[total] = weight
+        return weight
     
     def add_cell(self, cell: Tuple[int, int]) -> None:
         """
-        Добавляет новую ячейку к диаграмме и обновляет граничные ячейки.
-        
+        Добавляет новую ячейку к диаграмме и обновляет фронт роста.
+
+        Фронт обновляется инкрементально: добавленная ячейка выбывает из
+        него, а изменить статус могут только её соседи справа и сверху,
+        поэтому стоимость шага O(1) вместо полного пересчета.
+
         Параметры:
         -----------
         cell : Tuple[int, int]
             Координаты ячейки для добавления.
         """
         self.cells.add(cell)
-        # Обновляем граничные ячейки
-        self._boundary_cells = self._calculate_boundary_cells()
+        x, y = cell
+
+        # Дописываем координаты в SoA-колонки, удваивая емкость при переполнении
+        if self._n == len(self._xs):
+            self._xs = np.concatenate([self._xs, np.empty_like(self._xs)])
+            self._ys = np.concatenate([self._ys, np.empty_like(self._ys)])
+            self._keys = np.concatenate([self._keys, np.empty_like(self._keys)])
+        self._xs[self._n] = x
+        self._ys[self._n] = y
+        self._keys[self._n] = (x << 32) | y
+        self._n += 1
+
+        # Сама ячейка больше не кандидат, а опору от неё получают только
+        # соседи справа и сверху — проверяем их добавимость
+        self._addable.discard(cell)
+        for nx, ny in ((x + 1, y), (x, y + 1)):
+            if ((nx, ny) not in self.cells
+                    and (ny == 0 or (nx, ny - 1) in self.cells)
+                    and (nx == 0 or (nx - 1, ny) in self.cells)):
+                self._addable.add((nx, ny))
         
     def simulate(self, n_steps: int = 1000, alpha: float = 1.0, 
                  callback: Optional[callable] = None) -> None:
@@ -125,7 +287,27 @@ class Diagram2D:
         # Валидация входных параметров
         if n_steps <= 0:
             raise ValueError("Количество шагов должно быть положительным числом")
-            
+
+        # Без callback весь цикл роста выполняется скомпилированным ядром
+        # на упакованных ключах; путь на Python остается для пошагового
+        # наблюдения и на случай отсутствия Numba
+        if njit is not None and callback is None:
+            initial = np.asarray(list(self.cells), dtype=np.int64)
+            seed = int(self._rng.integers(0, 2**31 - 1))
+            xs, ys = _simulate_core(initial[:, 0], initial[:, 1],
+                                    n_steps, float(alpha), seed)
+            grown = len(xs) - len(self.cells)
+            if grown < n_steps:
+                raise ValueError(f"На шаге {grown} нет доступных клеток для добавления. Диаграмма достигла предела роста.")
+            self.cells = set(zip(xs.tolist(), ys.tolist()))
+            # SoA-колонки забираем прямо из результата ядра
+            self._xs = xs
+            self._ys = ys
+            self._keys = (xs << 32) | ys
+            self._n = len(xs)
+            self._addable = self._calculate_addable_cells()
+            return
+
         for step in range(n_steps):
             # Получаем все ячейки, которые можно добавить
             addable_cells = self.get_addable_cells()
@@ -133,20 +315,18 @@ class Diagram2D:
                 # Более информативное сообщение об ошибке
                 raise ValueError(f"На шаге {step} нет доступных клеток для добавления. Диаграмма достигла предела роста.")
                 
-            # Вычисляем веса для каждой добавляемой ячейки
-            weights = []
+            # Вычисляем S(c) = ((x+1)(y+1)) ** alpha для всех добавляемых
+            # ячеек одним векторизованным проходом вместо трех питоновских
+            # циклов (веса, вероятности, выбор)
             cells_list = list(addable_cells)
-            
-            # Вычисляем S(c) для каждой добавляемой ячейки
-            for cell in cells_list:
-                weights.append(self.calculate_weight(cell, alpha))
-                
-            # Вычисляем вероятности для каждой ячейки
-            total_weight = sum(weights)
-            probabilities = [w / total_weight for w in weights]
-            
-            # Случайно выбираем ячейку для добавления на основе вероятностей
-            cell = random.choices(cells_list, weights=probabilities, k=1)[0]
+            arr = np.asarray(cells_list, dtype=np.int64)
+            weights = ((arr[:, 0] + 1) * (arr[:, 1] + 1)).astype(np.float64) ** alpha
+
+            # Выбор по инверсии CDF: один случайный скаляр и searchsorted,
+            # нормализация вероятностей не нужна
+            cumulative = np.cumsum(weights)
+            idx = int(np.searchsorted(cumulative, self._rng.random() * cumulative[-1]))
+            cell = cells_list[idx]
             self.add_cell(cell)
             
             # Вызываем callback, если он предоставлен
@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, Tuple, List, Set, Optional, Union, Any
 import os
 import sys
@@ -10,6 +12,11 @@ import matplotlib.colors as mcolors
 import logging
 import pickle
 
+try:
+    from numba import njit
+except ImportError:  # Numba опциональна: без неё остается векторизованный NumPy
+    njit = None
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -20,6 +27,40 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from common.utils import save_cells_to_file, compute_limit_shape
 from diagrams3d.young_diagram import Diagram3D
 
+
+def _accumulate(cells: np.ndarray, grid: np.ndarray) -> None:
+    """
+    Прибавляет единицу в плотную сетку счетчиков по каждой ячейке прогона.
+
+    Компилируется Numba (если установлена): цикл исполняется как машинный
+    код без питоновских кортежей и хэширования словаря.
+    """
+    for i in range(cells.shape[0]):
+        grid[cells[i, 0], cells[i, 1], cells[i, 2]] += 1
+
+
+if njit is not None:
+    _accumulate = njit(cache=True)(_accumulate)
+
+
+@lru_cache(maxsize=8)
+def _colormap_lut(colormap: str) -> np.ndarray:
+    """256-цветная RGBA-таблица для выбранной цветовой карты."""
+    return plt.get_cmap(colormap)(np.linspace(0, 1, 256))
+
+
+def _one_run(n_steps: int, alpha: float,
+             initial_cells: Optional[Set[Tuple[int, int, int]]]) -> np.ndarray:
+    """
+    Выполняет один независимый прогон симуляции в дочернем процессе.
+
+    Возвращает ячейки диаграммы массивом (N, 3) — он пиклится одним
+    блоком памяти, без пообъектной сериализации кортежей.
+    """
+    diagram = Diagram3D(initial_cells)
+    diagram.simulate(n_steps=n_steps, alpha=alpha)
+    return np.asarray(list(diagram.cells), dtype=np.int64)
+
 # Конфигурация визуализации
 class VisualizationConfig:
     """
@@ -45,11 +86,158 @@ class DiagramSimulator3D:
         """
         Инициализируем с пустым значением
         """
+        # Кэшированное SoA-представление счетчиков: колонки координат и
+        # частот строятся один раз и переиспользуются всеми визуализациями
+        self._keys_arr: Optional[np.ndarray] = None
+        self._counts_arr: Optional[np.ndarray] = None
+        self._max_count: int = 0
+        self._bbox: Tuple[int, int, int] = (0, 0, 0)
+        # Кэшированная фигура: повторные визуализации не платят за
+        # создание осей, трансформаций и рендерера matplotlib
+        self._fig: Optional[plt.Figure] = None
+        self._ax: Optional[Axes3D] = None
+        # Счетчики агрегируются в плотной int64-гистограмме (индексация
+        # вместо хэширования кортежей); словарь материализуется лениво
+        self._grid: Optional[np.ndarray] = None
+        # Сетка предельной формы зависит только от счетчиков — кэшируется
+        # по поколению кэша, которое растет при каждой инвалидации
+        self._gen: int = 0
+        self._limit_shape_cache: Optional[Tuple[int, Tuple]] = None
         self.total_cell_counts = defaultdict(int)  # словарь для подсчета количества дубликатов в каждой ячейке
+
+    @property
+    def total_cell_counts(self) -> Union[Dict[Tuple[int, int, int], int], Tuple[np.ndarray, ...]]:
+        """
+        Счетчики ячеек: словарь {(x, y, z): count} либо SoA-кортеж.
+
+        Материализуется из плотной гистограммы лениво — горячие пути
+        (_ensure_arrays, визуализации) работают с массивами напрямую.
+        """
+        if self._total_cell_counts is None:
+            counts = defaultdict(int)
+            if self._grid is not None:
+                xs, ys, zs = np.nonzero(self._grid)
+                counts.update(zip(zip(xs.tolist(), ys.tolist(), zs.tolist()),
+                                  self._grid[xs, ys, zs].tolist()))
+            self._total_cell_counts = counts
+        return self._total_cell_counts
+
+    @total_cell_counts.setter
+    def total_cell_counts(self, value) -> None:
+        self._total_cell_counts = value
+        self._grid = None
+        self._invalidate_cache()
+
+    def _has_cells(self) -> bool:
+        """
+        Проверяет наличие накопленных счетчиков, не материализуя словарь
+        из плотной гистограммы (guard-путь визуализаций остается O(1)).
+        """
+        return self._grid is not None or bool(self._total_cell_counts)
+
+    def _accumulate_run(self, cells: Union[Set[Tuple[int, int, int]], np.ndarray]) -> None:
+        """Добавляет ячейки завершенного прогона в плотную гистограмму."""
+        if isinstance(cells, np.ndarray):
+            arr = cells
+        else:
+            arr = np.asarray(list(cells), dtype=np.int64)
+        bounds = arr.max(axis=0) + 1
+        if self._grid is None:
+            self._grid = np.zeros(bounds, dtype=np.int64)
+        elif np.any(bounds > self._grid.shape):
+            # Расширяем гистограмму до объединенной границы прогонов
+            shape = np.maximum(bounds, self._grid.shape)
+            grid = np.zeros(shape, dtype=np.int64)
+            grid[:self._grid.shape[0], :self._grid.shape[1], :self._grid.shape[2]] = self._grid
+            self._grid = grid
+        if njit is not None:
+            _accumulate(arr, self._grid)
+        else:
+            # Ячейки одного прогона уникальны — достаточно fancy-индекса
+            self._grid[arr[:, 0], arr[:, 1], arr[:, 2]] += 1
+        # Ленивый словарь и SoA-кэш устарели
+        self._total_cell_counts = None
+        self._invalidate_cache()
+
+    def _invalidate_cache(self) -> None:
+        """Сбрасывает кэш SoA-массивов после изменения счетчиков."""
+        self._keys_arr = None
+        self._counts_arr = None
+        self._max_count = 0
+        self._bbox = (0, 0, 0)
+        self._gen += 1
+        if self._fig is not None:
+            # Закрываем фигуру, чтобы реестр pyplot не накапливал объекты
+            plt.close(self._fig)
+            self._fig = None
+            self._ax = None
+
+    def __del__(self):
+        if getattr(self, '_fig', None) is not None:
+            plt.close(self._fig)
+
+    def _reuse_axes(self) -> Tuple[plt.Figure, Axes3D]:
+        """
+        Возвращает кэшированную фигуру экземпляра с одиночными 3D-осями.
+
+        fig.clear() вместо ax.cla() — очистка фигуры убирает и оси
+        цветовой шкалы, добавленные предыдущим вызовом.
+        """
+        if self._fig is None:
+            self._fig = plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
+        else:
+            self._fig.clear()
+            self._fig.set_size_inches(*VisualizationConfig.DEFAULT_FIGURE_SIZE)
+        self._ax = self._fig.add_subplot(111, projection='3d')
+        return self._fig, self._ax
+
+    def _ensure_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Строит (и кэширует) колоночное представление счетчиков.
+
+        Возвращает:
+        -----------
+        Tuple[np.ndarray, np.ndarray]
+            Массив координат формы (N, 3) и массив счетчиков длины N.
+        """
+        if self._keys_arr is None:
+            if self._total_cell_counts is None and self._grid is not None:
+                # Быстрый путь: колонки извлекаются прямо из гистограммы,
+                # словарь не материализуется
+                xs, ys, zs = np.nonzero(self._grid)
+                keys = np.ascontiguousarray(
+                    np.stack((xs, ys, zs), axis=1).astype(np.int64))
+                counts = np.ascontiguousarray(self._grid[xs, ys, zs])
+                self._keys_arr = keys
+                self._counts_arr = counts
+                self._max_count = int(counts.max()) if len(counts) else 0
+                # Размеры совпадают с формой гистограммы — без редукции
+                self._bbox = self._grid.shape
+                return self._keys_arr, self._counts_arr
+            src = self.total_cell_counts
+            if isinstance(src, tuple):
+                # Счетчики присвоены извне уже в колоночном виде
+                keys = np.ascontiguousarray(np.stack(src[:-1], axis=1))
+                counts = np.asarray(src[-1], dtype=np.int64)
+            else:
+                n = len(src)
+                keys = np.fromiter(src.keys(),
+                                   dtype=np.dtype((np.int64, 3)), count=n)
+                counts = np.fromiter(src.values(), dtype=np.int64, count=n)
+                if n == 0:
+                    keys = keys.reshape(0, 3)
+            self._keys_arr = keys
+            self._counts_arr = counts
+            self._max_count = int(counts.max()) if len(counts) else 0
+            # Одна векторизованная редукция вместо покоординатных max()
+            self._bbox = (tuple((keys.max(axis=0) + 1).tolist())
+                          if len(counts) else (0, 0, 0))
+        return self._keys_arr, self._counts_arr
         
-    def simulate(self, n_steps: int = 1000, alpha: float = 1.0, runs: int = 10, 
-                 initial_cells: Optional[Set[Tuple[int, int, int]]] = None, 
-                 callback: Optional[callable] = None) -> None:
+    def simulate(self, n_steps: int = 1000, alpha: float = 1.0, runs: int = 10,
+                 initial_cells: Optional[Set[Tuple[int, int, int]]] = None,
+                 callback: Optional[callable] = None,
+                 max_workers: Optional[int] = None) -> None:
         """
         Выполняет симуляцию роста 3D диаграммы Юнга.
 
@@ -65,6 +253,10 @@ class DiagramSimulator3D:
             Начальный набор ячеек для симуляции.
         callback : callable, optional
             Функция, которая вызывается после каждого шага с текущим состоянием.
+        max_workers : int, optional
+            Количество процессов для параллельных прогонов. По умолчанию
+            используется число ядер; max_workers=1 отключает пул (например,
+            когда вызывающий код уже распределил прогоны по процессам).
 
         Возвращает:
         -----------
@@ -82,38 +274,86 @@ class DiagramSimulator3D:
             
         # Обновляем счетчик для новой симуляции
         self.total_cell_counts = defaultdict(int)
-        
+
+        # Прогоны независимы — без callback раскладываем их по процессам
+        # и сливаем результаты в общую гистограмму
+        workers = min(runs, max_workers if max_workers is not None
+                      else (os.cpu_count() or 1))
+        if callback is None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_one_run, n_steps, alpha, initial_cells)
+                           for _ in range(runs)]
+                for run, future in enumerate(futures, start=1):
+                    try:
+                        cells_arr = future.result()
+                    except Exception as e:
+                        logger.error(f"Ошибка в симуляции {run}: {str(e)}")
+                        raise
+                    self._accumulate_run(cells_arr)
+                    logger.info(f'Симуляция {run} завершена. Размер диаграммы: {len(cells_arr)} клеток.')
+            return
+
         for run in range(1, runs + 1):
             try:
                 # Создаем новую диаграмму на каждый запуск
                 diagram = Diagram3D(initial_cells)
-                
-                # Отслеживаем рост диаграммы в реальном времени
-                def growth_callback(diagram, step):
-                    if callback:
-                        # Сохраняем текущее состояние для внешнего вызова
-                        temp_counts = self.total_cell_counts.copy()
-                        for cell in diagram.cells:
-                            temp_counts[cell] += 1
-                        callback(temp_counts, step, run)
-                
+
+                # Отслеживаем рост диаграммы в реальном времени.
+                # Без внешнего callback не устанавливаем и внутренний —
+                # состояние для него не собирается вовсе
+                if callback is None:
+                    growth_callback = None
+                else:
+                    # Бегущая гистограмма: копия накопленных счетчиков
+                    # делается один раз на прогон, каждый вызов докидывает
+                    # только ячейки, выросшие с прошлого вызова, — вместо
+                    # O(N) копии словаря на каждом шаге
+                    running = self.total_cell_counts.copy()
+                    counted: Set[Tuple[int, int, int]] = set()
+
+                    def growth_callback(diagram, step):
+                        new_cells = diagram.cells - counted
+                        for cell in new_cells:
+                            running[cell] += 1
+                        counted.update(new_cells)
+                        callback(running, step, run)
+
                 # Запускаем симуляцию
                 diagram.simulate(n_steps=n_steps, alpha=alpha, callback=growth_callback)
                 
-                # Обновляем счетчик для каждой ячейки в диаграмме
-                for cell in diagram.cells:
-                    self.total_cell_counts[cell] += 1
+                # Обновляем счетчики одним проходом скомпилированного цикла
+                self._accumulate_run(diagram.cells)
                     
                 logger.info(f'Симуляция {run} завершена. Размер диаграммы: {len(diagram.cells)} клеток.')
             except Exception as e:
                 logger.error(f"Ошибка в симуляции {run}: {str(e)}")
                 raise
-    
-    def visualize(self, filename: Optional[str] = None, 
+
+    def cells_soa(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Возвращает накопленные счетчики ячеек в колоночном (SoA) виде.
+
+        Колонки — непрерывные NumPy-массивы, которые дешево пиклятся,
+        хэшируются и сериализуются без промежуточных Python-объектов.
+
+        Возвращает:
+        -----------
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+            Массивы координат x, y, z и счетчиков одинаковой длины.
+        """
+        keys, counts = self._ensure_arrays()
+        return (np.ascontiguousarray(keys[:, 0]),
+                np.ascontiguousarray(keys[:, 1]),
+                np.ascontiguousarray(keys[:, 2]),
+                counts)
+
+    def visualize(self, filename: Optional[str] = None,
                  alpha_cubes: float = VisualizationConfig.DEFAULT_ALPHA_CUBES,
                  elev: int = VisualizationConfig.DEFAULT_ELEV, 
                  azim: int = VisualizationConfig.DEFAULT_AZIM,
-                 colormap: str = VisualizationConfig.DEFAULT_COLORMAP) -> plt.Figure:
+                 colormap: str = VisualizationConfig.DEFAULT_COLORMAP,
+                 show: bool = False,
+                 ax: Optional[Axes3D] = None) -> plt.Figure:
         """
         Визуализирует результаты симуляции с помощью вокселей.
         
@@ -129,6 +369,12 @@ class DiagramSimulator3D:
             Азимутальный угол для 3D вида.
         colormap : str, default='plasma'
             Цветовая карта для визуализации.
+        show : bool, default=False
+            Показать фигуру в интерактивном окне. По умолчанию фигура
+            только строится — сервер рендерит её без GUI.
+        ax : Axes3D, optional
+            Готовые 3D-оси для отрисовки. Если не указаны, используется
+            кэшированная фигура экземпляра.
             
         Возвращает:
         -----------
@@ -139,36 +385,39 @@ class DiagramSimulator3D:
         -----------
         ValueError: Если нет клеток для отображения.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
         
-        try:    
-            # Находим размеры 3D пространства
-            max_x = max(x for x, _, _ in self.total_cell_counts.keys()) + 1
-            max_y = max(y for _, y, _ in self.total_cell_counts.keys()) + 1
-            max_z = max(z for _, _, z in self.total_cell_counts.keys()) + 1
-            
-            # Создаем булев массив для заполнения вокселей
-            voxels = np.zeros((max_x, max_y, max_z), dtype=bool)
-            
-            # Создаем массив цветов для вокселей
-            max_count = max(self.total_cell_counts.values())
+        try:
+            # Извлекаем колонки один раз: размеры пространства, воксели и
+            # цвета заполняются векторизованно, без цикла по ячейкам
+            keys, counts = self._ensure_arrays()
+            xs, ys, zs = keys.T
+            max_x, max_y, max_z = self._bbox
+
+            # Булев массив вокселей: гистограмма уже хранит заполненность,
+            # иначе — одно fancy-index присваивание по колонкам
+            if self._grid is not None and self._grid.shape == (max_x, max_y, max_z):
+                voxels = self._grid > 0
+            else:
+                voxels = np.zeros((max_x, max_y, max_z), dtype=bool)
+                voxels[xs, ys, zs] = True
+
+            # Все RGBA-цвета одним вызовом colormap по нормализованным
+            # частотам; альфа-канал задается броадкастом
+            max_count = self._max_count
+            lut = _colormap_lut(colormap)
+            rgba = lut[(counts * (255.0 / max_count)).astype(np.uint8)]
+            rgba[:, 3] = alpha_cubes
             colors = np.zeros(voxels.shape + (4,))  # RGBA colors
+            colors[xs, ys, zs] = rgba
             
-            # Заполняем массивы вокселей и цветов
-            for (x, y, z), count in self.total_cell_counts.items():
-                voxels[x, y, z] = True
-                
-                # Нормализуем счетчик и создаем цвет
-                normalized_count = count / max_count
-                color_func = getattr(cm, colormap)
-                colors[x, y, z] = color_func(normalized_count)
-                # Последнее значение - это alpha (прозрачность)
-                colors[x, y, z, 3] = alpha_cubes
-            
-            # Создаем фигуру
-            fig = plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
-            ax = fig.add_subplot(111, projection='3d')
+            # Рисуем на переданных осях либо на кэшированной фигуре
+            if ax is not None:
+                fig = ax.figure
+                ax.cla()
+            else:
+                fig, ax = self._reuse_axes()
             
             # Рисуем воксели
             ax.voxels(voxels, facecolors=colors, edgecolor='k', linewidth=0.5)
@@ -198,14 +447,15 @@ class DiagramSimulator3D:
             norm = plt.Normalize(0, 1)
             sm = plt.cm.ScalarMappable(cmap=colormap, norm=norm)
             sm.set_array([])
-            plt.colorbar(sm, ax=ax, label='Нормализованная частота')
+            fig.colorbar(sm, ax=ax, label='Нормализованная частота')
             
             # Сохраняем, если указано имя файла
             if filename:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
                 logger.info(f"Изображение сохранено: {filename}")
                 
-            plt.show()
+            if show:
+                plt.show()
             
             # Возвращаем фигуру для использования в веб-API
             return fig
@@ -217,7 +467,9 @@ class DiagramSimulator3D:
     def visualize_point_cloud(self, filename: Optional[str] = None, 
                              alpha_points: float = 0.8, 
                              size_factor: int = VisualizationConfig.DEFAULT_POINT_SIZE_FACTOR,
-                             colormap: str = VisualizationConfig.DEFAULT_COLORMAP) -> plt.Figure:
+                             colormap: str = VisualizationConfig.DEFAULT_COLORMAP,
+                             show: bool = False,
+                             ax: Optional[Axes3D] = None) -> plt.Figure:
         """
         Визуализирует результаты симуляции в виде облака точек разных размеров.
         
@@ -231,6 +483,12 @@ class DiagramSimulator3D:
             Коэффициент размера для точек.
         colormap : str, default='plasma'
             Цветовая карта для визуализации.
+        show : bool, default=False
+            Показать фигуру в интерактивном окне. По умолчанию фигура
+            только строится — сервер рендерит её без GUI.
+        ax : Axes3D, optional
+            Готовые 3D-оси для отрисовки. Если не указаны, используется
+            кэшированная фигура экземпляра.
             
         Возвращает:
         -----------
@@ -241,39 +499,29 @@ class DiagramSimulator3D:
         -----------
         ValueError: Если нет клеток для отображения.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
             
         try:
-            # Извлекаем координаты и счетчики
-            x_coords = []
-            y_coords = []
-            z_coords = []
-            sizes = []
-            colors = []
-            
-            max_count = max(self.total_cell_counts.values())
-            
-            for (x, y, z), count in self.total_cell_counts.items():
-                x_coords.append(x)
-                y_coords.append(y)
-                z_coords.append(z)
-                
-                # Размер пропорционален счетчику
-                normalized_count = count / max_count
-                sizes.append(normalized_count * size_factor)
-                colors.append(normalized_count)
-            
-            # Создаем фигуру
-            fig = plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
-            ax = fig.add_subplot(111, projection='3d')
-            
-            # Создаем диаграмму рассеяния
-            scatter = ax.scatter(x_coords, y_coords, z_coords, 
-                               c=colors, cmap=colormap, s=sizes, alpha=alpha_points)
+            # Колонки координат и счетчиков из SoA-кэша; размеры и цвета
+            # считаются одним векторизованным выражением, без list.append
+            keys, counts = self._ensure_arrays()
+            normalized = counts / self._max_count
+
+            # Рисуем на переданных осях либо на кэшированной фигуре
+            if ax is not None:
+                fig = ax.figure
+                ax.cla()
+            else:
+                fig, ax = self._reuse_axes()
+
+            # Создаем диаграмму рассеяния (размер пропорционален счетчику)
+            scatter = ax.scatter(keys[:, 0], keys[:, 1], keys[:, 2],
+                               c=normalized, cmap=colormap,
+                               s=normalized * size_factor, alpha=alpha_points)
             
             # Добавляем цветовую шкалу
-            plt.colorbar(scatter, ax=ax, label='Нормализованная частота')
+            fig.colorbar(scatter, ax=ax, label='Нормализованная частота')
             
             # Настраиваем подписи осей
             ax.set_xlabel('X')
@@ -281,7 +529,7 @@ class DiagramSimulator3D:
             ax.set_zlabel('Z')
             
             # Находим максимальный размер в любом измерении
-            max_dim = max(max(x_coords), max(y_coords), max(z_coords)) + 1
+            max_dim = max(self._bbox)
             
             # Устанавливаем одинаковое соотношение сторон для всех осей
             ax.set_box_aspect([1, 1, 1])
@@ -295,10 +543,11 @@ class DiagramSimulator3D:
             
             # Сохраняем, если указано имя файла
             if filename:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
                 logger.info(f"Изображение облака точек сохранено: {filename}")
                 
-            plt.show()
+            if show:
+                plt.show()
             
             # Возвращаем фигуру для использования в веб-API
             return fig
@@ -330,7 +579,9 @@ class DiagramSimulator3D:
     def visualize_limit_shape(self, filename: Optional[str] = None, 
                              level: float = VisualizationConfig.DEFAULT_ISOSURFACE_LEVEL, 
                              alpha_surface: float = VisualizationConfig.DEFAULT_ALPHA_SURFACE,
-                             colormap: str = VisualizationConfig.DEFAULT_COLORMAP) -> plt.Figure:
+                             colormap: str = VisualizationConfig.DEFAULT_COLORMAP,
+                             fig: Optional[plt.Figure] = None,
+                             show: bool = False) -> plt.Figure:
         """
         Визуализирует предельную форму с помощью изоповерхностей в 3D.
         
@@ -344,6 +595,11 @@ class DiagramSimulator3D:
             Прозрачность поверхности.
         colormap : str, default='viridis'
             Цветовая карта для визуализации.
+        fig : plt.Figure, optional
+            Переиспользуемая фигура. Если не указана, создается новая.
+        show : bool, default=False
+            Показать фигуру в интерактивном окне. По умолчанию фигура
+            только строится — сервер рендерит её без GUI.
             
         Возвращает:
         -----------
@@ -354,7 +610,7 @@ class DiagramSimulator3D:
         -----------
         ValueError: Если нет клеток для отображения или не установлена библиотека skimage.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
             
         try:
@@ -366,22 +622,37 @@ class DiagramSimulator3D:
             raise ValueError("Требуется библиотека scikit-image")
             
         try:
-            # Вычисляем предельную форму
-            grid_x, grid_y, grid_z, grid_v = compute_limit_shape(
-                self.total_cell_counts, dimensions=3)
-            
+            # Вычисляем предельную форму; для одного снимка счетчиков сетка
+            # неизменна — свипы по level/colormap берут её из кэша
+            if (self._limit_shape_cache is not None
+                    and self._limit_shape_cache[0] == self._gen):
+                grid_x, grid_y, grid_z, grid_v = self._limit_shape_cache[1]
+            else:
+                # Счетчики передаются SoA-колонками: словарь из
+                # гистограммы не материализуется
+                grid_x, grid_y, grid_z, grid_v = compute_limit_shape(
+                    self.cells_soa(), dimensions=3)
+                self._limit_shape_cache = (
+                    self._gen, (grid_x, grid_y, grid_z, grid_v))
+
             # Извлекаем изоповерхность на указанном уровне
             verts, faces, _, _ = measure.marching_cubes(grid_v, level=level)
             
-            # Масштабируем вершины обратно к исходной системе координат
+            # Масштабируем вершины обратно к исходной системе координат:
+            # один броадкаст-проход вместо трех по каждой колонке
             x_size, y_size, z_size = grid_x.max(), grid_y.max(), grid_z.max()
-            verts[:, 0] *= x_size / grid_v.shape[0]
-            verts[:, 1] *= y_size / grid_v.shape[1] 
-            verts[:, 2] *= z_size / grid_v.shape[2]
-            
-            # Создаем фигуру
-            fig = plt.figure(figsize=VisualizationConfig.DEFAULT_FIGURE_SIZE)
-            ax = fig.add_subplot(111, projection='3d')
+            verts *= np.array([x_size / grid_v.shape[0],
+                               y_size / grid_v.shape[1],
+                               z_size / grid_v.shape[2]], dtype=verts.dtype)
+            
+            # Переиспользуем переданную фигуру (например, из пула)
+            # либо кэшированную фигуру экземпляра
+            if fig is None:
+                fig, ax = self._reuse_axes()
+            else:
+                fig.clear()
+                fig.set_size_inches(*VisualizationConfig.DEFAULT_FIGURE_SIZE)
+                ax = fig.add_subplot(111, projection='3d')
             
             # Рисуем изоповерхность
             mesh = ax.plot_trisurf(verts[:, 0], verts[:, 1], verts[:, 2],
@@ -399,10 +670,11 @@ class DiagramSimulator3D:
             
             # Сохраняем, если указано имя файла
             if filename:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
                 logger.info(f"Изображение предельной формы сохранено: {filename}")
                 
-            plt.show()
+            if show:
+                plt.show()
             
             # Возвращаем фигуру для использования в веб-API
             return fig
@@ -413,7 +685,8 @@ class DiagramSimulator3D:
         
     def visualize_slices(self, filename: Optional[str] = None, 
                         num_slices: int = VisualizationConfig.DEFAULT_SLICE_COUNT,
-                        colormap: str = VisualizationConfig.DEFAULT_COLORMAP) -> plt.Figure:
+                        colormap: str = VisualizationConfig.DEFAULT_COLORMAP,
+                        show: bool = False) -> plt.Figure:
         """
         Визуализирует 2D срезы 3D диаграммы на разных уровнях z.
         
@@ -425,6 +698,9 @@ class DiagramSimulator3D:
             Количество z-срезов для отображения.
         colormap : str, default='plasma'
             Цветовая карта для визуализации.
+        show : bool, default=False
+            Показать фигуру в интерактивном окне. По умолчанию фигура
+            только строится — сервер рендерит её без GUI.
             
         Возвращает:
         -----------
@@ -435,70 +711,86 @@ class DiagramSimulator3D:
         -----------
         ValueError: Если нет клеток для отображения.
         """
-        if not self.total_cell_counts:
+        if not self._has_cells():
             raise ValueError("Нет клеток, которые можно отобразить. Запустите симуляцию перед визуализацией.")
         
-        try:    
-            # Находим диапазон значений z
-            z_values = [z for _, _, z in self.total_cell_counts.keys()]
-            min_z, max_z = min(z_values), max(z_values)
-            
-            # Определяем позиции срезов
-            if num_slices == 1:
-                slice_positions = [min_z]
+        try:
+            # Колонки координат и счетчиков один раз; выбор среза — булева
+            # маска по z вместо питоновской фильтрации словаря
+            keys, counts = self._ensure_arrays()
+            xs, ys, zs = keys.T
+
+            # Позиции срезов выбираются из реально заселенных уровней z:
+            # linspace по диапазону давал дубли на маленьких диаграммах
+            # (лишние отрисовки того же среза) и мог попадать на пустые уровни
+            populated_zs = np.unique(zs)
+            idx = np.unique(np.linspace(0, len(populated_zs) - 1,
+                                        num_slices).astype(int))
+            slice_positions = populated_zs[idx]
+
+            # Переиспользуем кэшированную фигуру, пересоздавая подграфики
+            if self._fig is None:
+                self._fig = plt.figure(figsize=(15, 5))
             else:
-                slice_positions = np.linspace(min_z, max_z, num_slices, dtype=int)
-            
-            # Создаем фигуру с подграфиками
-            fig, axes = plt.subplots(1, len(slice_positions), figsize=(15, 5))
-            if num_slices == 1:
+                self._fig.clear()
+                self._fig.set_size_inches(15, 5)
+            fig = self._fig
+            axes = fig.subplots(1, len(slice_positions))
+            if len(slice_positions) == 1:
                 axes = [axes]
-                
+
             # Устанавливаем заголовок для всей фигуры
             fig.suptitle('Срезы 3D диаграммы Юнга по Z', fontsize=16)
-            
+
             # Максимальное значение счетчика для нормализации
-            max_count = max(self.total_cell_counts.values())
-            
+            inv_max = 1.0 / self._max_count
+            max_x, max_y = self._bbox[0], self._bbox[1]
+
             # Обрабатываем каждый срез
             for i, z in enumerate(slice_positions):
-                # Извлекаем ячейки на этом уровне z
-                slice_cells = {(x, y): count for (x, y, z_val), count in self.total_cell_counts.items() if z_val == z}
-                
-                if not slice_cells:
-                    axes[i].text(0.5, 0.5, f'Нет ячеек при z={z}', 
+                # Ячейки на этом уровне z выбираются векторизованной маской
+                mask = zs == z
+                n_cells = int(mask.sum())
+
+                if n_cells == 0:
+                    axes[i].text(0.5, 0.5, f'Нет ячеек при z={z}',
                                horizontalalignment='center', verticalalignment='center')
                     axes[i].set_title(f'z = {z}')
                     continue
-                    
-                # Подготавливаем данные для визуализации
-                x_coords, y_coords, frequencies = [], [], []
-                for (x, y), count in slice_cells.items():
-                    x_coords.append(x)
-                    y_coords.append(y)
-                    frequencies.append(count / max_count)
-                    
-                # Создаем диаграмму рассеяния для этого среза
-                scatter = axes[i].scatter(x_coords, y_coords, c=frequencies, cmap=colormap, 
-                                       s=100, alpha=0.8, edgecolors='k', marker='s')
-                
+
+                if n_cells >= 0.05 * max_x * max_y:
+                    # Плотный срез рисуется одной текстурой imshow — один
+                    # draw-call вместо глифа на ячейку; пустые ячейки
+                    # отмечаются NaN и не закрашиваются
+                    img = np.full((max_x, max_y), np.nan)
+                    img[xs[mask], ys[mask]] = counts[mask] * inv_max
+                    artist = axes[i].imshow(img.T, origin='lower', cmap=colormap,
+                                            vmin=0, vmax=1)
+                else:
+                    # Разреженный срез: растеризовать весь bbox ради
+                    # нескольких ячеек невыгодно, остается scatter
+                    artist = axes[i].scatter(xs[mask], ys[mask], c=counts[mask] * inv_max,
+                                           cmap=colormap,
+                                           s=100, alpha=0.8, edgecolors='k', marker='s')
+
                 axes[i].set_title(f'z = {z}')
                 axes[i].set_xlabel('x')
                 axes[i].set_ylabel('y')
                 axes[i].grid(True)
                 axes[i].set_aspect('equal')
-                
+
             # Добавляем общую цветовую шкалу
-            plt.colorbar(scatter, ax=axes, label='Нормализованная частота')
+            fig.colorbar(artist, ax=axes, label='Нормализованная частота')
             
-            plt.tight_layout(rect=[0, 0, 1, 0.95])  # Регулируем расположение, чтобы оставить место для заголовка
+            fig.tight_layout(rect=[0, 0, 1, 0.95])  # Регулируем расположение, чтобы оставить место для заголовка
             
             # Сохраняем, если указано имя файла
             if filename:
-                plt.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
+                fig.savefig(filename, dpi=VisualizationConfig.DEFAULT_DPI, bbox_inches='tight')
                 logger.info(f"Изображение срезов сохранено: {filename}")
                 
-            plt.show()
+            if show:
+                plt.show()
             
             # Возвращаем фигуру для использования в веб-API
             return fig
@@ -520,30 +812,27 @@ class DiagramSimulator3D:
         -----------
         ValueError: Если нет данных для экспорта.
         """
-        if not self.total_cell_counts:
+        keys, counts = self._ensure_arrays()
+        if len(counts) == 0:
             return {"error": "Нет доступных данных. Сначала выполните симуляцию."}
-            
-        # Конвертируем в формат, подходящий для сериализации JSON
-        cells_data = []
-        max_count = max(self.total_cell_counts.values())
-        
-        for (x, y, z), count in self.total_cell_counts.items():
-            normalized_count = count / max_count
-            cells_data.append({
-                "x": x,
-                "y": y,
-                "z": z,
-                "count": count,
-                "normalized_count": normalized_count
-            })
-            
+
+        # Колоночный формат: четыре плоских списка вместо словаря на каждую
+        # ячейку — нет миллионов мелких dict и повторяющихся строк-ключей,
+        # сериализация и payload в разы компактнее
+        max_count = self._max_count
+        max_x, max_y, max_z = self._bbox
+
         return {
-            "cells": cells_data,
+            "xs": keys[:, 0].tolist(),
+            "ys": keys[:, 1].tolist(),
+            "zs": keys[:, 2].tolist(),
+            "counts": counts.tolist(),
+            "normalized_counts": (counts / max_count).tolist(),
             "max_count": max_count,
             "dimensions": {
-                "max_x": max(x for x, _, _ in self.total_cell_counts.keys()) + 1,
-                "max_y": max(y for _, y, _ in self.total_cell_counts.keys()) + 1,
-                "max_z": max(z for _, _, z in self.total_cell_counts.keys()) + 1
+                "max_x": int(max_x),
+                "max_y": int(max_y),
+                "max_z": int(max_z)
             }
         }
         
@@ -560,12 +849,16 @@ class DiagramSimulator3D:
         -----------
         Exception: При ошибке сохранения состояния.
         """
-        state = {
-            "total_cell_counts": dict(self.total_cell_counts)
-        }
         try:
+            # Компактный колоночный формат: два массива вместо пикла словаря
+            # кортежей — меньше файл и нет пообъектной сериализации
+            keys, counts = self._ensure_arrays()
+            # Пишем в открытый дескриптор, чтобы np.savez не дописывал
+            # расширение .npz к переданному имени файла
             with open(filename, 'wb') as f:
-                pickle.dump(state, f)
+                np.savez_compressed(f,
+                                    keys=keys.astype(np.int32),
+                                    counts=counts)
             logger.info(f"Состояние симуляции сохранено в файл: {filename}")
         except Exception as e:
             logger.error(f"Ошибка при сохранении состояния в {filename}: {str(e)}")
@@ -586,8 +879,15 @@ class DiagramSimulator3D:
         FileNotFoundError: Если файл не найден.
         """
         try:
-            with open(filename, 'rb') as f:
-                state = pickle.load(f)
+            try:
+                data = np.load(filename)
+                self.total_cell_counts = defaultdict(int, zip(
+                    map(tuple, data['keys'].tolist()),
+                    data['counts'].tolist()))
+            except (ValueError, pickle.UnpicklingError):
+                # Старый формат: состояние целиком запиклено словарем
+                with open(filename, 'rb') as f:
+                    state = pickle.load(f)
                 self.total_cell_counts = defaultdict(int, state["total_cell_counts"])
             logger.info(f"Состояние симуляции загружено из файла: {filename}")
         except FileNotFoundError:
@@ -1,9 +1,143 @@
-import random
+import numpy as np
 from typing import Set, Tuple, List, Dict, Optional, Union, Any
 import logging
 
+try:
+    from numba import njit, types as _nb_types
+    from numba.typed import Dict as _NumbaDict
+except ImportError:  # Numba опциональна: без неё работает путь на Python
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Смещения упакованного ключа на единицу по каждой оси: сосед (x-1, y, z)
+# ячейки с ключом k имеет ключ k - DX и т.д.
+DX = 1 << 42
+DY = 1 << 21
+DZ = 1
+
+
+def _try_add(member, add_pos, add_x, add_y, add_z, k, cx, cy, cz):
+    """
+    Добавляет кандидата (cx, cy, cz) во фронт роста, если его еще нет
+    ни в диаграмме, ни во фронте, и у него есть опоры снизу, слева и сзади.
+    Возвращает новый размер фронта.
+
+    Проверка опор собрана в одно выражение без коротких замыканий (&/|
+    вместо and/or): три теста членства независимы, и LLVM сводит их
+    к прямолинейному коду без ветвлений на каждое условие.
+    """
+    key = (cx << 42) | (cy << 21) | cz
+    if key in member or key in add_pos:
+        return k
+    supported = (((cy == 0) | ((key - DY) in member))
+                 & ((cx == 0) | ((key - DX) in member))
+                 & ((cz == 0) | ((key - DZ) in member)))
+    if not supported:
+        return k
+    add_x[k] = cx
+    add_y[k] = cy
+    add_z[k] = cz
+    add_pos[key] = k
+    return k + 1
+
+
+if njit is not None:
+    _try_add = njit(cache=True)(_try_add)
+
+
+def _simulate_core(init_x: np.ndarray, init_y: np.ndarray, init_z: np.ndarray,
+                   n_steps: int, alpha: float,
+                   seed: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ядро симуляции роста на упакованных int64-ключах
+    ((x << 42) | (y << 21) | z; 21 бит на координату).
+
+    Членство и фронт добавляемых ячеек хранятся в словарях с целыми
+    ключами вместо множеств кортежей — под Numba это C-уровневые
+    хэш-операции без создания Python-объектов. Возвращает массивы
+    координат всех ячеек; если рост остановился раньше, массивы короче
+    ожидаемого (вызывающий код пишет предупреждение).
+    """
+    np.random.seed(seed)
+    n0 = init_x.shape[0]
+    total = n0 + n_steps
+
+    # Типизированный словарь членства с упакованными ключами
+    member = _NumbaDict.empty(_nb_types.int64, _nb_types.boolean)
+
+    xs = np.empty(total, np.int64)
+    ys = np.empty(total, np.int64)
+    zs = np.empty(total, np.int64)
+    for i in range(n0):
+        xs[i] = init_x[i]
+        ys[i] = init_y[i]
+        zs[i] = init_z[i]
+        member[(init_x[i] << 42) | (init_y[i] << 21) | init_z[i]] = True
+    n = n0
+
+    # Фронт добавляемых ячеек: массивы координат + словарь key -> позиция
+    # для удаления обменом с последним элементом; каждый шаг добавляет не
+    # больше трех кандидатов и убирает один
+    add_x = np.empty(3 * total + 3, np.int64)
+    add_y = np.empty(3 * total + 3, np.int64)
+    add_z = np.empty(3 * total + 3, np.int64)
+    add_pos = _NumbaDict.empty(_nb_types.int64, _nb_types.int64)
+    k = 0
+
+    for i in range(n0):
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k,
+                     init_x[i] + 1, init_y[i], init_z[i])
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k,
+                     init_x[i], init_y[i] + 1, init_z[i])
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k,
+                     init_x[i], init_y[i], init_z[i] + 1)
+
+    for step in range(n_steps):
+        if k == 0:
+            break
+
+        # Веса S(c) = ((x+1)(y+1)(z+1)) ** alpha и выбор по инверсии CDF;
+        # при alpha == 1.0 дорогой pow не нужен — вес равен объему
+        weights = ((add_x[:k] + 1) * (add_y[:k] + 1)
+                   * (add_z[:k] + 1)).astype(np.float64)
+        if alpha != 1.0:
+            weights = weights ** alpha
+        cumulative = np.cumsum(weights)
+        idx = int(np.searchsorted(cumulative, np.random.random() * cumulative[-1]))
+        if idx >= k:
+            idx = k - 1
+
+        cx = add_x[idx]
+        cy = add_y[idx]
+        cz = add_z[idx]
+        key = (cx << 42) | (cy << 21) | cz
+
+        # Удаляем выбранную ячейку из фронта обменом с последней
+        k -= 1
+        del add_pos[key]
+        if idx < k:
+            add_x[idx] = add_x[k]
+            add_y[idx] = add_y[k]
+            add_z[idx] = add_z[k]
+            add_pos[(add_x[k] << 42) | (add_y[k] << 21) | add_z[k]] = idx
+
+        member[key] = True
+        xs[n] = cx
+        ys[n] = cy
+        zs[n] = cz
+        n += 1
+
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k, cx + 1, cy, cz)
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k, cx, cy + 1, cz)
+        k = _try_add(member, add_pos, add_x, add_y, add_z, k, cx, cy, cz + 1)
+
+    return xs[:n], ys[:n], zs[:n]
+
+
+if njit is not None:
+    _simulate_core = njit(cache=True)(_simulate_core)
+
 class Diagram3D:
     """
     Класс, представляющий 3D диаграмму Юнга с возможностями симуляции роста.
@@ -12,19 +146,52 @@ class Diagram3D:
     Диаграмма следует правилу: если куб с координатами (x,y,z) находится в диаграмме,
     то все кубы с координатами (x',y',z'), где x' <= x, y' <= y, z' <= z, также должны быть в диаграмме.
     """
-    def __init__(self, initial_cells: Optional[Set[Tuple[int, int, int]]] = None):
+    def __init__(self, initial_cells: Optional[Set[Tuple[int, int, int]]] = None,
+                 boundary_cells: Optional[Set[Tuple[int, int, int]]] = None):
         """
         Инициализация 3D диаграммы Юнга.
-        
+
         Параметры:
         -----------
         initial_cells : Set[Tuple[int, int, int]], optional
             Начальный набор ячеек. Если None, начинается с ячейки (0, 0, 0).
+        boundary_cells : Set[Tuple[int, int, int]], optional
+            Готовое множество граничных ячеек (например, из to_dict).
+            Если указано, полный пересчет границы пропускается.
         """
         self.cells: Set[Tuple[int, int, int]] = initial_cells if initial_cells else {(0, 0, 0)}
-        # Для оптимизации будем отслеживать граничные ячейки
-        self._boundary_cells: Set[Tuple[int, int, int]] = self._calculate_boundary_cells()
-        
+        # Параллельное SoA-хранилище: колонки координат растут удвоением,
+        # а упакованные ключи (x << 42) | (y << 21) | z позволяют
+        # векторизовать проверки соседей без обхода множества кортежей
+        capacity = max(16, 2 * len(self.cells))
+        self._xs = np.empty(capacity, np.int64)
+        self._ys = np.empty(capacity, np.int64)
+        self._zs = np.empty(capacity, np.int64)
+        self._keys = np.empty(capacity, np.int64)
+        self._n = 0
+        for x, y, z in self.cells:
+            self._xs[self._n] = x
+            self._ys[self._n] = y
+            self._zs[self._n] = z
+            self._keys[self._n] = (x << 42) | (y << 21) | z
+            self._n += 1
+        # Бегущие максимумы координат: диаграмма только растет, поэтому
+        # add_cell обновляет их за O(1), а статистика не обходит ячейки
+        self._max_x = int(self._xs[:self._n].max())
+        self._max_y = int(self._ys[:self._n].max())
+        self._max_z = int(self._zs[:self._n].max())
+        # Для оптимизации будем отслеживать граничные ячейки; сериализованная
+        # граница (from_dict) принимается на веру без пересчета
+        self._boundary_cells: Set[Tuple[int, int, int]] = (
+            boundary_cells if boundary_cells is not None
+            else self._calculate_boundary_cells())
+        # Фронт роста хранится в параллельных колонках координат со
+        # словарем позиций: add_cell правит его за O(1), а веса на шаге
+        # симуляции считаются по срезам колонок без конвертации множества
+        self._set_frontier(self._calculate_addable_cells())
+        # Один генератор на диаграмму: избегаем глобального состояния random
+        self._rng = np.random.default_rng()
+
     def _calculate_boundary_cells(self) -> Set[Tuple[int, int, int]]:
         """
         Определяет граничные ячейки диаграммы, которые могут иметь новые добавляемые соседи.
@@ -43,33 +210,110 @@ class Diagram3D:
                 boundary.add((x, y, z))
         return boundary
         
+    def _calculate_addable_cells(self) -> Set[Tuple[int, int, int]]:
+        """
+        Полный пересчет фронта роста по текущим ячейкам диаграммы.
+
+        Кандидаты — соседи всех ячеек в трех положительных направлениях;
+        проверки членства (сам кандидат, опора снизу, соседи слева и сзади)
+        выполняются одним np.isin по упакованным int64-ключам вместо
+        питоновских in-тестов.
+
+        Возвращает:
+        --------
+        Set[Tuple[int, int, int]]
+            Множество ячеек, которые можно добавить к диаграмме.
+        """
+        xs = self._xs[:self._n]
+        ys = self._ys[:self._n]
+        zs = self._zs[:self._n]
+        cand_x = np.concatenate([xs + 1, xs, xs])
+        cand_y = np.concatenate([ys, ys + 1, ys])
+        cand_z = np.concatenate([zs, zs, zs + 1])
+
+        member_keys = self._keys[:self._n]
+        queries = np.concatenate([
+            (cand_x << 42) | (cand_y << 21) | cand_z,        # сам кандидат
+            (cand_x << 42) | ((cand_y - 1) << 21) | cand_z,  # опора снизу
+            ((cand_x - 1) << 42) | (cand_y << 21) | cand_z,  # сосед слева
+            (cand_x << 42) | (cand_y << 21) | (cand_z - 1),  # сосед сзади
+        ])
+        hits = np.isin(queries, member_keys)
+
+        m = len(cand_x)
+        in_diagram = hits[:m]
+        below = hits[m:2 * m]
+        left = hits[2 * m:3 * m]
+        back = hits[3 * m:]
+        mask = (~in_diagram & ((cand_y == 0) | below)
+                & ((cand_x == 0) | left) & ((cand_z == 0) | back))
+
+        return set(zip(cand_x[mask].tolist(), cand_y[mask].tolist(),
+                       cand_z[mask].tolist()))
+
+    def _set_frontier(self, cells: Set[Tuple[int, int, int]]) -> None:
+        """
+        Заполняет колонки фронта роста из множества кандидатов.
+        """
+        capacity = max(16, 2 * len(cells))
+        self._add_x = np.empty(capacity, np.int64)
+        self._add_y = np.empty(capacity, np.int64)
+        self._add_z = np.empty(capacity, np.int64)
+        # Позиция каждого кандидата в колонках — для удаления за O(1)
+        self._add_pos: Dict[Tuple[int, int, int], int] = {}
+        self._add_n = 0
+        for x, y, z in cells:
+            self._add_x[self._add_n] = x
+            self._add_y[self._add_n] = y
+            self._add_z[self._add_n] = z
+            self._add_pos[(x, y, z)] = self._add_n
+            self._add_n += 1
+
+    def _frontier_add(self, cell: Tuple[int, int, int]) -> None:
+        """
+        Дописывает кандидата в колонки фронта, удваивая емкость при переполнении.
+        """
+        if self._add_n == len(self._add_x):
+            self._add_x = np.concatenate([self._add_x, np.empty_like(self._add_x)])
+            self._add_y = np.concatenate([self._add_y, np.empty_like(self._add_y)])
+            self._add_z = np.concatenate([self._add_z, np.empty_like(self._add_z)])
+        self._add_x[self._add_n] = cell[0]
+        self._add_y[self._add_n] = cell[1]
+        self._add_z[self._add_n] = cell[2]
+        self._add_pos[cell] = self._add_n
+        self._add_n += 1
+
+    def _frontier_discard(self, cell: Tuple[int, int, int]) -> None:
+        """
+        Убирает кандидата из колонок фронта обменом с последним элементом.
+        """
+        i = self._add_pos.pop(cell, None)
+        if i is None:
+            return
+        self._add_n -= 1
+        k = self._add_n
+        if i != k:
+            self._add_x[i] = self._add_x[k]
+            self._add_y[i] = self._add_y[k]
+            self._add_z[i] = self._add_z[k]
+            self._add_pos[(int(self._add_x[k]), int(self._add_y[k]),
+                           int(self._add_z[k]))] = i
+
     def get_addable_cells(self) -> Set[Tuple[int, int, int]]:
         """
         Находит все ячейки, которые можно добавить к диаграмме согласно правилам 3D диаграммы Юнга.
         Ячейка может быть добавлена, если у неё есть соседи во всех трех направлениях: слева, снизу и сзади.
-        
+
+        Фронт поддерживается инкрементально в add_cell, поэтому вызов
+        собирает множество из готового словаря позиций без пересчета.
+
         Возвращает:
         --------
         Set[Tuple[int, int, int]]
             Набор координат (x, y, z), которые можно добавить к диаграмме.
         """
-        addable_cells = set()
-        # Используем только граничные ячейки для оптимизации
-        for x, y, z in self._boundary_cells:
-            # Возможные новые ячейки в трех положительных направлениях
-            neighbors = [(x + 1, y, z), (x, y + 1, z), (x, y, z + 1)]
-            for nx, ny, nz in neighbors:
-                # Если соседняя ячейка еще не в диаграмме
-                if (nx, ny, nz) not in self.cells:
-                    # Проверяем, есть ли у неё поддержка со всех трех сторон
-                    has_support_below = ny == 0 or (nx, ny - 1, nz) in self.cells
-                    has_left_neighbor = nx == 0 or (nx - 1, ny, nz) in self.cells
-                    has_back_neighbor = nz == 0 or (nx, ny, nz - 1) in self.cells
-                    
-                    if has_support_below and has_left_neighbor and has_back_neighbor:
-                        addable_cells.add((nx, ny, nz))
-        return addable_cells
-    
+        return set(self._add_pos)
+
     def calculate_weight(self, cell: Tuple[int, int, int], alpha: float = 1.0) -> float:
         """
         Вычисляет вес ячейки для вероятностного выбора при росте диаграммы.
@@ -95,26 +339,78 @@ class Diagram3D:
         x, y, z = cell
         # Вычисляем объем прямоугольного параллелепипеда
         volume = (x + 1) * (y + 1) * (z + 1)
+        # При alpha == 1.0 (значение по умолчанию) pow не нужен
+        if alpha == 1.0:
+            return float(volume)
         return volume ** alpha
     
     def add_cell(self, cell: Tuple[int, int, int]) -> None:
         """
         Добавляет новую ячейку к диаграмме и обновляет граничные ячейки.
-        
+
+        Граница правится инкрементально: статус могли изменить только сама
+        новая ячейка и её соседи в трех отрицательных направлениях (ячейка
+        могла закрыть их последнее свободное положительное направление),
+        поэтому стоимость шага O(1) вместо пересчета по всем ячейкам.
+        Фронт роста обновляется так же: сама ячейка выбывает из кандидатов,
+        а получить недостающую опору от неё могут только её соседи в трех
+        положительных направлениях.
+
         Параметры:
         -----------
         cell : Tuple[int, int, int]
             Координаты ячейки для добавления.
         """
         self.cells.add(cell)
-        # Обновляем граничные ячейки
-        self._boundary_cells = self._calculate_boundary_cells()
+        x, y, z = cell
+
+        # Дописываем координаты в SoA-колонки, удваивая емкость при переполнении
+        if self._n == len(self._xs):
+            self._xs = np.concatenate([self._xs, np.empty_like(self._xs)])
+            self._ys = np.concatenate([self._ys, np.empty_like(self._ys)])
+            self._zs = np.concatenate([self._zs, np.empty_like(self._zs)])
+            self._keys = np.concatenate([self._keys, np.empty_like(self._keys)])
+        self._xs[self._n] = x
+        self._ys[self._n] = y
+        self._zs[self._n] = z
+        self._keys[self._n] = (x << 42) | (y << 21) | z
+        self._n += 1
+
+        # Поддерживаем бегущие максимумы координат
+        if x > self._max_x:
+            self._max_x = x
+        if y > self._max_y:
+            self._max_y = y
+        if z > self._max_z:
+            self._max_z = z
+
+        for cx, cy, cz in (cell, (x - 1, y, z), (x, y - 1, z), (x, y, z - 1)):
+            if (cx, cy, cz) not in self.cells:
+                continue
+            if ((cx + 1, cy, cz) in self.cells and
+                    (cx, cy + 1, cz) in self.cells and
+                    (cx, cy, cz + 1) in self.cells):
+                self._boundary_cells.discard((cx, cy, cz))
+            else:
+                self._boundary_cells.add((cx, cy, cz))
+
+        # Сама ячейка больше не кандидат, а опору от неё получают только
+        # соседи в положительных направлениях — проверяем их добавимость
+        self._frontier_discard(cell)
+        for nx, ny, nz in ((x + 1, y, z), (x, y + 1, z), (x, y, z + 1)):
+            if ((nx, ny, nz) not in self.cells
+                    and (nx, ny, nz) not in self._add_pos
+                    and (ny == 0 or (nx, ny - 1, nz) in self.cells)
+                    and (nx == 0 or (nx - 1, ny, nz) in self.cells)
+                    and (nz == 0 or (nx, ny, nz - 1) in self.cells)):
+                self._frontier_add((nx, ny, nz))
         
-    def simulate(self, n_steps: int = 1000, alpha: float = 1.0, 
-                 callback: Optional[callable] = None) -> None:
+    def simulate(self, n_steps: int = 1000, alpha: float = 1.0,
+                 callback: Optional[callable] = None,
+                 callback_every: int = 10) -> None:
         """
         Симулирует рост диаграммы в течение n_steps итераций.
-        
+
         Параметры:
         -----------
         n_steps : int, default=1000
@@ -123,7 +419,10 @@ class Diagram3D:
             Параметр, влияющий на поведение роста.
         callback : callable, optional
             Функция, которая вызывается после каждого шага с текущим состоянием.
-            
+        callback_every : int, default=10
+            Периодичность вызова callback в шагах: вызывать на каждом шаге
+            слишком дорого для производительности.
+
         Исключения:
         --------
         ValueError: Если входные параметры некорректны или нет доступных ячеек для добавления.
@@ -131,35 +430,66 @@ class Diagram3D:
         # Валидация входных параметров
         if n_steps <= 0:
             raise ValueError("Количество шагов должно быть положительным числом")
-            
+
+        # Без callback весь цикл роста выполняется скомпилированным ядром
+        # на упакованных ключах; путь на Python остается для пошагового
+        # наблюдения и на случай отсутствия Numba
+        if njit is not None and callback is None:
+            initial = np.asarray(list(self.cells), dtype=np.int64)
+            seed = int(self._rng.integers(0, 2**31 - 1))
+            xs, ys, zs = _simulate_core(initial[:, 0], initial[:, 1],
+                                        initial[:, 2], n_steps, float(alpha),
+                                        seed)
+            grown = len(xs) - len(self.cells)
+            if grown < n_steps:
+                logger.warning(f"На шаге {grown} нет доступных клеток для добавления. Диаграмма достигла предела роста.")
+            self.cells = set(zip(xs.tolist(), ys.tolist(), zs.tolist()))
+            # SoA-колонки забираем прямо из результата ядра
+            self._xs = xs
+            self._ys = ys
+            self._zs = zs
+            self._keys = (xs << 42) | (ys << 21) | zs
+            self._n = len(xs)
+            self._max_x = int(xs.max())
+            self._max_y = int(ys.max())
+            self._max_z = int(zs.max())
+            self._boundary_cells = self._calculate_boundary_cells()
+            self._set_frontier(self._calculate_addable_cells())
+            return
+
+        # Номер следующего шага с callback вместо проверки остатка от
+        # деления на каждой итерации; без callback сравнение никогда
+        # не срабатывает
+        next_cb = 0 if callback is not None else n_steps
+
         for step in range(n_steps):
-            # Получаем все ячейки, которые можно добавить
-            addable_cells = self.get_addable_cells()
-            if not addable_cells:
+            k = self._add_n
+            if k == 0:
                 # Более информативное сообщение об ошибке
                 logger.warning(f"На шаге {step} нет доступных клеток для добавления. Диаграмма достигла предела роста.")
                 break
-                
-            # Вычисляем веса для каждой добавляемой ячейки
-            weights = []
-            cells_list = list(addable_cells)
-            
-            # Вычисляем S(c) для каждой добавляемой ячейки
-            for cell in cells_list:
-                weights.append(self.calculate_weight(cell, alpha))
-                
-            # Вычисляем вероятности для каждой ячейки
-            total_weight = sum(weights)
-            probabilities = [w / total_weight for w in weights]
-            
-            # Случайно выбираем ячейку для добавления на основе вероятностей
-            cell = random.choices(cells_list, weights=probabilities, k=1)[0]
+
+            # Вычисляем S(c) = ((x+1)(y+1)(z+1)) ** alpha для всех добавляемых
+            # ячеек одним векторизованным проходом по колонкам фронта —
+            # множество не конвертируется в список на каждом шаге;
+            # при alpha == 1.0 дорогой pow не нужен — вес равен объему
+            weights = ((self._add_x[:k] + 1) * (self._add_y[:k] + 1)
+                       * (self._add_z[:k] + 1)).astype(np.float64)
+            if alpha != 1.0:
+                weights = weights ** alpha
+
+            # Выбор по инверсии CDF: один случайный скаляр и searchsorted,
+            # нормализация вероятностей не нужна
+            cumulative = np.cumsum(weights)
+            idx = int(np.searchsorted(cumulative, self._rng.random() * cumulative[-1]))
+            cell = (int(self._add_x[idx]), int(self._add_y[idx]),
+                    int(self._add_z[idx]))
             self.add_cell(cell)
             
-            # Вызываем callback, если он предоставлен и если сейчас подходящий шаг
-            # Вызываем не на каждом шаге для оптимизации производительности
-            if callback and step % 10 == 0:
+            # Вызываем callback на запланированном шаге
+            if step == next_cb:
                 callback(self, step)
+                next_cb += callback_every
                 
     def size(self) -> int:
         """
@@ -193,10 +523,12 @@ class Diagram3D:
                 "volume": 0
             }
         
-        max_x = max(x for x, _, _ in self.cells)
-        max_y = max(y for _, y, _ in self.cells)
-        max_z = max(z for _, _, z in self.cells)
-        
+        # Максимумы мемоизированы: диаграмма только растет, поэтому
+        # add_cell поддерживает их бегущими значениями за O(1)
+        max_x = self._max_x
+        max_y = self._max_y
+        max_z = self._max_z
+
         volume = (max_x + 1) * (max_y + 1) * (max_z + 1)
         
         return {
@@ -209,15 +541,22 @@ class Diagram3D:
     def to_dict(self) -> Dict[str, Any]:
         """
         Сериализует диаграмму в словарь для сохранения.
-        
+
+        Ячейки выдаются плоскими int32-массивами (N, 3) вместо списков
+        кортежей: непрерывный блок памяти на порядок компактнее и пиклится
+        одним куском, без пообъектной сериализации.
+
         Возвращает:
         --------
         Dict[str, Any]
             Словарь с данными диаграммы.
         """
         return {
-            "cells": list(self.cells),
-            "boundary_cells": list(self._boundary_cells),
+            "cells": np.ascontiguousarray(np.stack(
+                (self._xs[:self._n], self._ys[:self._n], self._zs[:self._n]),
+                axis=1).astype(np.int32)),
+            "boundary_cells": np.asarray(list(self._boundary_cells),
+                                         dtype=np.int32),
             "statistics": self.get_statistics()
         }
     
@@ -236,6 +575,14 @@ class Diagram3D:
         Diagram3D
             Новый экземпляр диаграммы.
         """
-        diagram = cls(set(tuple(cell) for cell in data["cells"]))
-        # Отслеживание граничных ячеек будет автоматически обновлено при инициализации
+        # .tolist() превращает и массивы, и списки кортежей в кортежи
+        # обычных python-int (np.int32 переполнился бы при упаковке ключей)
+        cells = set(map(tuple, np.asarray(data["cells"], dtype=np.int64).tolist()))
+        boundary = data.get("boundary_cells")
+        if boundary is not None and len(boundary):
+            boundary = set(map(tuple,
+                               np.asarray(boundary, dtype=np.int64).tolist()))
+        else:
+            boundary = None
+        diagram = cls(cells, boundary_cells=boundary)
         return diagram
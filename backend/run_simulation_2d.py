@@ -5,7 +5,6 @@
 import os
 import argparse
 import logging
-from diagrams2d import DiagramSimulator2D
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -40,7 +39,11 @@ def main():
     if args.runs <= 0:
         logger.error("Количество запусков должно быть положительным числом")
         return
-    
+
+    # Тяжелый импорт (matplotlib, numpy и т.д.) выполняется после разбора
+    # и проверки аргументов: --help и ошибки валидации отвечают мгновенно
+    from diagrams2d import DiagramSimulator2D
+
     try:
         # Создаем выходную директорию, если она не существует
         os.makedirs(args.output_dir, exist_ok=True)
@@ -4,7 +4,6 @@
 """
 import os
 import argparse
-from diagrams3d import DiagramSimulator3D
 
 
 def main():
@@ -20,11 +19,15 @@ def main():
                       help='Количество запусков симуляции (по умолчанию: 10)')
     parser.add_argument('--output-dir', type=str, default='results_3d',
                       help='Директория для сохранения выходных файлов (по умолчанию: results_3d)')
-    parser.add_argument('--visualization', type=str, choices=['voxel', 'point', 'slice', 'all'], 
+    parser.add_argument('--visualization', type=str, choices=['voxel', 'point', 'slice', 'limit', 'all'],
                       default='all', help='Тип визуализации для генерации (по умолчанию: all)')
     
     args = parser.parse_args()
-    
+
+    # Тяжелый импорт (matplotlib, numpy и т.д.) выполняется после разбора
+    # аргументов: --help и ошибки валидации отвечают мгновенно
+    from diagrams3d import DiagramSimulator3D
+
     # Создаем выходную директорию, если она не существует
     os.makedirs(args.output_dir, exist_ok=True)
     
@@ -69,13 +72,16 @@ def main():
             print("  Генерация визуализации срезов...")
             simulator.visualize_slices(filename=f"{base_filename}_slices.png")
     
-    # Пытаемся сгенерировать визуализацию предельной формы (требуется scikit-image)
-    try:
-        from skimage import measure
-        print("  Генерация визуализации предельной формы...")
-        simulator.visualize_limit_shape(filename=f"{base_filename}_limit_shape.png")
-    except ImportError:
-        print("  Пропуск визуализации предельной формы (scikit-image не установлен)")
+    # Пытаемся сгенерировать визуализацию предельной формы (требуется
+    # scikit-image); импорт очень тяжелый, поэтому выполняется только
+    # когда эта визуализация действительно запрошена
+    if args.visualization in ('all', 'limit'):
+        try:
+            from skimage import measure
+            print("  Генерация визуализации предельной формы...")
+            simulator.visualize_limit_shape(filename=f"{base_filename}_limit_shape.png")
+        except ImportError:
+            print("  Пропуск визуализации предельной формы (scikit-image не установлен)")
     
     print("Готово!")
     
@@ -22,6 +22,29 @@ const DEFAULT_PARAMS: ISimulationParams3D = {
 // API URL
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "/api";
 
+// Сервер отдает ячейки в колоночном формате {x: [], y: [], z: [], value: []},
+// собираем из него массив объектов для отрисовки
+const toCellArray = (cells: unknown): ICell3D[] => {
+    if (Array.isArray(cells)) {
+        return cells as ICell3D[];
+    }
+    const columns = cells as {
+        x?: number[];
+        y?: number[];
+        z?: number[];
+        value?: number[];
+    };
+    if (columns && Array.isArray(columns.x)) {
+        return columns.x.map((x, i) => ({
+            x,
+            y: columns.y![i],
+            z: columns.z![i],
+            value: columns.value![i],
+        }));
+    }
+    return [];
+};
+
 export const useSimulation3D = () => {
     const [cells, setCells] = useState<ICell3D[]>([]);
     const [isLoading, setIsLoading] = useState<boolean>(false);
@@ -72,8 +95,9 @@ export const useSimulation3D = () => {
             const simulationData = await response.json();
             console.log("Simulation data:", simulationData);
 
-            if (simulationData.cells && Array.isArray(simulationData.cells)) {
-                setCells(simulationData.cells);
+            const simulationCells = toCellArray(simulationData.cells);
+            if (simulationCells.length > 0) {
+                setCells(simulationCells);
                 setIsSimulationCompleted(true);
             } else {
                 // Если нет прямого ответа с ячейками, делаем дополнительный запрос на визуализацию
@@ -90,11 +114,9 @@ export const useSimulation3D = () => {
                 const visualizationData = await visualizationResponse.json();
                 console.log("Visualization data:", visualizationData);
 
-                if (
-                    visualizationData.cells &&
-                    Array.isArray(visualizationData.cells)
-                ) {
-                    setCells(visualizationData.cells);
+                const visualizationCells = toCellArray(visualizationData.cells);
+                if (visualizationCells.length > 0) {
+                    setCells(visualizationCells);
                     setIsSimulationCompleted(true);
                 } else {
                     throw new Error("Полученные данные имеют неверный формат");
@@ -127,9 +149,10 @@ export const useSimulation3D = () => {
                 );
             }
 
-            const data = await response.json();
-            if (data.image) {
-                setLimitShapeImage(data.image);
+            // Сервер отдает PNG напрямую, без base64 и JSON-обертки
+            const blob = await response.blob();
+            if (blob.size > 0) {
+                setLimitShapeImage(URL.createObjectURL(blob));
             } else {
                 throw new Error(
                     "Ошибка при получении изображения предельной формы"